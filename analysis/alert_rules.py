@@ -0,0 +1,175 @@
+import math
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from analysis.analytics import compute_price_stats, load_history
+from database.database import DatabaseHandler, TIMESTAMP_FORMAT
+
+
+# Mapping of rule types (as written in the YAML config) to rule classes
+RULE_REGISTRY = {}
+
+def register_rule(rule_type: str):
+    """Decorator to register alert rule classes under a config ``type``."""
+    def decorator(cls):
+        if getattr(cls, '__abstractmethods__', None):
+            raise TypeError(f"Alert rule {cls.__name__} does not implement {', '.join(sorted(cls.__abstractmethods__))}")
+        RULE_REGISTRY[rule_type] = cls
+        cls.rule_type = rule_type
+        return cls
+    return decorator
+
+
+class AlertRule(ABC):
+    """Base class of alert rules.
+
+    ``evaluate`` receives the product's statistics (see
+    ``analysis.analytics.compute_price_stats``) and its stock transition, and
+    returns a human readable reason when the rule triggers, else None.
+    """
+    rule_type = ''
+    # Rules that look at prices only run for products with a new observation
+    needs_new_price = True
+
+    def __init__(self, options: Dict):
+        self.products = options.get('products')
+        self.window_days = options.get('days')
+
+    def applies_to(self, name: str) -> bool:
+        return not self.products or name in self.products
+
+    @abstractmethod
+    def evaluate(self, stats: Dict, stock: Dict) -> Optional[str]:
+        pass
+
+
+@register_rule('price_below')
+class PriceBelowRule(AlertRule):
+    def __init__(self, options: Dict):
+        super().__init__(options)
+        self.threshold = float(options['threshold'])
+
+    def evaluate(self, stats, stock):
+        if stats['latest'] < self.threshold:
+            return f"Price {stats['latest']:.2f} is below {self.threshold:.2f}"
+        return None
+
+
+@register_rule('drop_from_last')
+class DropFromLastRule(AlertRule):
+    def __init__(self, options: Dict):
+        super().__init__(options)
+        self.percent = float(options.get('percent', 5))
+
+    def evaluate(self, stats, stock):
+        previous = stats['previous']
+        if math.isnan(previous) or previous <= 0:
+            return None
+        drop = (previous - stats['latest']) / previous * 100
+        if drop > self.percent:
+            return f"Price dropped {drop:.1f}% from {previous:.2f}"
+        return None
+
+
+@register_rule('drop_from_window_low')
+class DropFromWindowLowRule(AlertRule):
+    def __init__(self, options: Dict):
+        super().__init__(options)
+        self.percent = float(options.get('percent', 0))
+        self.window_days = options.get('days', 30)
+
+    def evaluate(self, stats, stock):
+        low = stats['prior_window_low']
+        if math.isnan(low) or low <= 0:
+            return None
+        drop = (low - stats['latest']) / low * 100
+        if drop > self.percent:
+            return f"Price is {drop:.1f}% below the {self.window_days}-day low of {low:.2f}"
+        return None
+
+
+@register_rule('back_in_stock')
+class BackInStockRule(AlertRule):
+    needs_new_price = False
+
+    def evaluate(self, stats, stock):
+        if stock.get('previous') is False and stock.get('current') is True:
+            return "Back in stock"
+        return None
+
+
+class AlertEngine:
+    """Evaluate the configured alert rules against the stored history.
+
+    Only products that trigger at least one rule, and were not alerted in the
+    last ``notify_every`` seconds, are returned, so charts and messages are
+    produced for them alone.
+    """
+
+    def __init__(self, alerts_config: Dict, window_days: int = 30):
+        alerts_config = alerts_config or {}
+        self.notify_every = alerts_config.get('notify_every', 0)
+        self.window_days = window_days
+        rules = alerts_config.get('rules')
+        if rules is None:
+            # Backwards compatible default: the legacy drop percentage
+            rules = [{'type': 'drop_from_last', 'percent': alerts_config.get('price_drop_percentage', 5)}]
+        self.rules = []
+        for options in rules:
+            rule_class = RULE_REGISTRY.get(options.get('type'))
+            if rule_class is None:
+                logging.error(f"Unknown alert rule type: {options.get('type')}")
+                continue
+            self.rules.append(rule_class(options))
+
+    def _in_cooldown(self, db: DatabaseHandler, name: str, now: datetime) -> bool:
+        last_alert = db.fetch_last_alert(name)
+        if not last_alert or not self.notify_every:
+            return False
+        return now - datetime.strptime(last_alert, TIMESTAMP_FORMAT) < timedelta(seconds=self.notify_every)
+
+    def evaluate(self, db: DatabaseHandler, updated: List[str], stock_changes: Dict[str, Dict],
+                 history: Optional[np.ndarray] = None) -> Dict[str, List[str]]:
+        """Return ``{product name: [reasons]}`` for the products that should be alerted.
+
+        ``updated`` lists products with a new observation in this cycle and
+        ``stock_changes`` maps product names to ``{'previous': .., 'current': ..}``.
+        ``history`` can be passed when it was already loaded this cycle.
+        """
+        updated = set(updated)
+        candidates = updated | set(stock_changes)
+        if not candidates or not self.rules:
+            return {}
+
+        # One vectorized pass per distinct window over the whole history
+        if history is None:
+            history = load_history(db)
+        names = db.fetch_product_names()
+        stats_by_window = {}
+        for days in {rule.window_days or self.window_days for rule in self.rules}:
+            stats = compute_price_stats(history, window_days=days)
+            stats_by_window[days] = {
+                names.get(product_id): {key: values[i].item() for key, values in stats.items()}
+                for i, product_id in enumerate(stats['product_id'].tolist())
+            }
+
+        now = datetime.utcnow()
+        triggered = {}
+        for name in candidates:
+            reasons = []
+            for rule in self.rules:
+                if not rule.applies_to(name):
+                    continue
+                if rule.needs_new_price and name not in updated:
+                    continue
+                stats = stats_by_window[rule.window_days or self.window_days].get(name)
+                if stats is None and rule.needs_new_price:
+                    continue
+                reason = rule.evaluate(stats or {}, stock_changes.get(name, {}))
+                if reason:
+                    reasons.append(reason)
+            if reasons and not self._in_cooldown(db, name, now):
+                triggered[name] = reasons
+        return triggered
@@ -0,0 +1,156 @@
+import time
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+from database.database import DatabaseHandler, get_database
+from config_loader import load_config
+
+# Load configuration from YAML file
+config = load_config()
+
+SECONDS_PER_DAY = 86400
+
+OBSERVATION_DTYPE = np.dtype([('product_id', np.int64), ('time', np.int64), ('price', np.float64)])
+
+
+def load_history(db: Optional[DatabaseHandler] = None, since=None) -> np.ndarray:
+    """Load price history into a structured array sorted by product and time.
+
+    Rows are streamed straight from sqlite into the array, without building a
+    list of Python tuples first.
+    """
+    db = db or get_database()
+    count = db.count_observations(since)
+    return np.fromiter(db.iter_observation_columns(since), dtype=OBSERVATION_DTYPE, count=count)
+
+
+def _segment_starts(product_ids: np.ndarray) -> np.ndarray:
+    """Index of the first row of every product in a product-sorted array."""
+    return np.flatnonzero(np.r_[True, product_ids[1:] != product_ids[:-1]])
+
+
+def compute_price_stats(history: np.ndarray, window_days: int = 30, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Compute per-product statistics for every product in one vectorized pass.
+
+    Returns a dict of equally long arrays, one entry per product:
+
+    - ``product_id``, ``latest`` (last observed price), ``latest_time``
+    - ``all_time_low`` and ``pct_from_all_time_low``
+    - ``window_low``, ``window_mean``, ``window_std`` over the last
+      ``window_days`` days, and ``pct_from_window_low``
+    - ``previous`` (price before the latest one) and ``prior_window_low``
+      (window low excluding the latest observation)
+    - ``volatility``: standard deviation of log returns inside the window
+    - ``zscore``: how many window standard deviations the latest price is
+      from the window mean (negative means cheaper than usual)
+
+    Window statistics are NaN for products without observations in the window.
+    """
+    if len(history) == 0:
+        return {key: np.array([]) for key in (
+            'product_id', 'latest', 'latest_time', 'previous', 'all_time_low', 'pct_from_all_time_low',
+            'window_low', 'prior_window_low', 'window_mean', 'window_std', 'pct_from_window_low',
+            'volatility', 'zscore')}
+
+    now = time.time() if now is None else now
+    product_ids, times, prices = history['product_id'], history['time'], history['price']
+    starts = _segment_starts(product_ids)
+    ends = np.r_[starts[1:], len(history)]
+
+    latest = prices[ends - 1]
+    has_previous = ends - starts > 1
+    previous = np.where(has_previous, prices[np.maximum(ends - 2, 0)], np.nan)
+    all_time_low = np.minimum.reduceat(prices, starts)
+
+    in_window = times >= now - window_days * SECONDS_PER_DAY
+    counts = np.add.reduceat(in_window.astype(np.int64), starts)
+    window_low = np.minimum.reduceat(np.where(in_window, prices, np.inf), starts)
+    is_latest = np.zeros(len(history), dtype=bool)
+    is_latest[ends - 1] = True
+    prior_window_low = np.minimum.reduceat(np.where(in_window & ~is_latest, prices, np.inf), starts)
+    sums = np.add.reduceat(np.where(in_window, prices, 0.0), starts)
+    squares = np.add.reduceat(np.where(in_window, prices * prices, 0.0), starts)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        window_mean = sums / counts
+        window_std = np.sqrt(np.maximum(squares / counts - window_mean * window_mean, 0.0))
+        window_low = np.where(counts > 0, window_low, np.nan)
+        prior_window_low = np.where(np.isfinite(prior_window_low), prior_window_low, np.nan)
+
+        # Log returns between consecutive observations of the same product
+        log_prices = np.log(prices)
+        returns = np.diff(log_prices, prepend=log_prices[0])
+        valid = in_window & np.r_[False, product_ids[1:] == product_ids[:-1]] & np.r_[False, in_window[:-1]]
+        return_counts = np.add.reduceat(valid.astype(np.int64), starts)
+        return_sums = np.add.reduceat(np.where(valid, returns, 0.0), starts)
+        return_squares = np.add.reduceat(np.where(valid, returns * returns, 0.0), starts)
+        return_mean = return_sums / return_counts
+        volatility = np.sqrt(np.maximum(return_squares / return_counts - return_mean * return_mean, 0.0))
+
+        zscore = np.where(window_std > 0, (latest - window_mean) / window_std, 0.0)
+        zscore = np.where(counts > 0, zscore, np.nan)
+
+        return {
+            'product_id': product_ids[starts],
+            'latest': latest,
+            'latest_time': times[ends - 1],
+            'previous': previous,
+            'all_time_low': all_time_low,
+            'pct_from_all_time_low': (latest - all_time_low) / all_time_low * 100,
+            'window_low': window_low,
+            'prior_window_low': prior_window_low,
+            'window_mean': window_mean,
+            'window_std': window_std,
+            'pct_from_window_low': (latest - window_low) / window_low * 100,
+            'volatility': volatility,
+            'zscore': zscore,
+        }
+
+
+def rolling_min(prices: np.ndarray, window: int) -> np.ndarray:
+    """Rolling minimum over the last ``window`` points of a single series."""
+    if len(prices) == 0:
+        return prices
+    padded = np.r_[np.full(window - 1, np.inf), prices]
+    return np.lib.stride_tricks.sliding_window_view(padded, window).min(axis=1)
+
+
+def rolling_mean(prices: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean over the last ``window`` points (fewer at the start)."""
+    cumulative = np.cumsum(np.r_[0.0, prices])
+    counts = np.minimum(np.arange(1, len(prices) + 1), window)
+    return (cumulative[1:] - cumulative[np.arange(1, len(prices) + 1) - counts]) / counts
+
+
+def detect_drops(stats: Dict[str, np.ndarray], zscore_threshold: float = -2.0) -> np.ndarray:
+    """Product ids whose latest price is unusually low for their window."""
+    with np.errstate(invalid='ignore'):
+        return stats['product_id'][stats['zscore'] <= zscore_threshold]
+
+
+def analyze_cycle(db: Optional[DatabaseHandler] = None, history: Optional[np.ndarray] = None) -> List[Dict]:
+    """Run the batched analysis after a scrape cycle and log notable drops.
+
+    Returns one dict of plain Python values per product.
+    """
+    db = db or get_database()
+    analysis_config = config.get('analysis') or {}
+    window_days = analysis_config.get('window_days', 30)
+
+    started = time.perf_counter()
+    if history is None:
+        history = load_history(db)
+    stats = compute_price_stats(history, window_days=window_days)
+    names = db.fetch_product_names()
+    dropped = set(detect_drops(stats, analysis_config.get('zscore_threshold', -2.0)).tolist())
+    logging.info(f"Analyzed {len(stats['product_id'])} products in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    results = []
+    for i, product_id in enumerate(stats['product_id'].tolist()):
+        row = {key: values[i].item() for key, values in stats.items()}
+        row['name'] = names.get(product_id)
+        row['unusual_drop'] = product_id in dropped
+        if row['unusual_drop']:
+            logging.info(f"Unusual price drop for {row['name']}: {row['latest']:.2f} (z-score {row['zscore']:.2f})")
+        results.append(row)
+    return results
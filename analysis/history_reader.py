@@ -0,0 +1,93 @@
+import time
+import calendar
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from analysis.analytics import OBSERVATION_DTYPE
+from database.export import COLUMNS, column_path, read_manifest, get_history_exporter
+
+
+def _unix(value) -> Optional[int]:
+    """Unix seconds of a naive UTC datetime, or the value itself."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return calendar.timegm(value.timetuple())
+
+
+def _month(seconds: int) -> str:
+    return time.strftime('%Y-%m', time.gmtime(seconds))
+
+
+class HistoryReader:
+    """Column-pruned, memory-mapped scans of the exported price history.
+
+    Partitions outside the requested products and months are never opened,
+    only the requested columns are mapped, and time filtering slices the
+    mapped arrays, so a scan over years of history reads just the pages it
+    touches and builds no Python objects per row.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or get_history_exporter().root
+        self.refresh()
+
+    def refresh(self):
+        """Pick up partitions committed by exports since the reader was created."""
+        self.manifest = read_manifest(self.root)
+
+    def partitions(self, product_ids: Optional[Iterable[int]] = None, start=None,
+                   end=None) -> List[Tuple[int, str, int]]:
+        """(product_id, month, rows) of the partitions a scan has to read, ordered by product and month."""
+        wanted = None if product_ids is None else {str(product_id) for product_id in product_ids}
+        first = _month(_unix(start)) if start is not None else None
+        last = _month(_unix(end)) if end is not None else None
+        selected = []
+        for product_id, months in self.manifest['partitions'].items():
+            if wanted is not None and product_id not in wanted:
+                continue
+            for month, rows in months.items():
+                if (first and month < first) or (last and month > last) or not rows:
+                    continue
+                selected.append((int(product_id), month, rows))
+        return sorted(selected)
+
+    def _map(self, product_id: int, month: str, column: str, rows: int) -> np.ndarray:
+        return np.memmap(column_path(self.root, product_id, month, column), dtype=COLUMNS[column],
+                         mode='r', shape=(rows,))
+
+    def scan(self, columns: Sequence[str] = ('time', 'price'), product_ids: Optional[Iterable[int]] = None,
+             start=None, end=None) -> Iterator[Tuple[int, str, Dict[str, np.ndarray]]]:
+        """Yield ``(product_id, month, {column: array})`` per partition.
+
+        The arrays are read-only views of the mapped files, restricted to
+        ``start <= time <= end`` (datetimes are taken as UTC).
+        """
+        start, end = _unix(start), _unix(end)
+        for product_id, month, rows in self.partitions(product_ids, start, end):
+            times = self._map(product_id, month, 'time', rows)
+            # Rows are appended in insertion order, so time is sorted within a partition
+            low = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            high = rows if end is None else int(np.searchsorted(times, end, side='right'))
+            if low >= high:
+                continue
+            yield product_id, month, {
+                column: (times if column == 'time' else self._map(product_id, month, column, rows))[low:high]
+                for column in columns
+            }
+
+    def load_history(self, product_ids: Optional[Iterable[int]] = None, start=None, end=None) -> np.ndarray:
+        """History in the layout of ``analysis.analytics.load_history``, for ``compute_price_stats``.
+
+        A long-range alternative to reading the observations table: only the
+        ``time`` and ``price`` columns of the matching partitions are touched.
+        """
+        parts = list(self.scan(('time', 'price'), product_ids, start, end))
+        history = np.empty(sum(len(columns['time']) for _, _, columns in parts), dtype=OBSERVATION_DTYPE)
+        offset = 0
+        for product_id, _, columns in parts:
+            size = len(columns['time'])
+            history['product_id'][offset:offset + size] = product_id
+            history['time'][offset:offset + size] = columns['time']
+            history['price'][offset:offset + size] = columns['price']
+            offset += size
+        return history
@@ -0,0 +1,135 @@
+import os
+import re
+import glob
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from database.database import DatabaseHandler, get_database
+from config_loader import load_config
+from monitoring import metrics
+
+# Load configuration from YAML file
+config = load_config()
+
+
+def _init_worker():
+    # Worker processes never need an interactive backend
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _slug(product_name: str) -> str:
+    return re.sub(r'[^\w.-]', '_', product_name.replace(' ', '_'))
+
+
+class RenderService:
+    """Render price charts in a process pool with an on-disk image cache.
+
+    Images are keyed by product and the id of its newest observation, so a
+    chart is only redrawn when the product's history actually changed.
+    Each render runs in its own process with the object-oriented Agg API, so
+    concurrent renders cannot share pyplot state.
+    """
+
+    def __init__(self, save_path: str, max_workers: int = 2, theme: str = 'ggplot',
+                 db: Optional[DatabaseHandler] = None):
+        self.save_path = save_path
+        self.theme = theme
+        self.db = db or get_database()
+        self.hits = 0
+        self.misses = 0
+        # Spawned, not forked: the scheduler, DB writer and event loop threads
+        # may hold locks at fork time that a forked child could never release
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(save_path, exist_ok=True)
+
+    def _cache_path(self, product_name: str, last_id, days: Optional[int]) -> str:
+        suffix = ''
+        if days:
+            # A sliding window changes daily even without new observations
+            suffix = f"_{days}d_{datetime.utcnow():%Y%m%d}"
+        return os.path.join(self.save_path, f"{_slug(product_name)}_{last_id}{suffix}_graph.png")
+
+    def render(self, product_name: str, days: Optional[int] = None) -> Future:
+        """Return a future resolving to the chart path, rendering only on a cache miss."""
+        last_id = self.db.fetch_last_observation_id(product_name)
+        path = self._cache_path(product_name, last_id, days)
+
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                metrics.inc('chart_cache_total', result='hit')
+                future = Future()
+                future.set_result(path)
+                return future
+            if path in self._pending:
+                return self._pending[path]
+            self.misses += 1
+            metrics.inc('chart_cache_total', result='miss')
+
+            # Matplotlib is only imported once a chart is actually needed
+            from analysis import visualizer
+
+            start = datetime.utcnow() - timedelta(days=days) if days else None
+            granularity, data = self.db.fetch_history(product_name, start=start)
+            future = self._executor.submit(
+                visualizer.render_price_history, path, product_name, granularity, data, self.theme
+            )
+            self._pending[path] = future
+
+        started = time.perf_counter()
+        future.add_done_callback(lambda f: self._finished(product_name, days, path, f, started))
+        return future
+
+    def _finished(self, product_name: str, days: Optional[int], path: str, future: Future, started: float):
+        # Includes the time spent queued behind other renders
+        metrics.observe('chart_render', time.perf_counter() - started)
+        with self._lock:
+            self._pending.pop(path, None)
+        if future.exception() is not None:
+            logging.error(f"Chart rendering failed for {product_name}: {future.exception()}")
+            return
+
+        # Drop stale images of the same product and window
+        suffix = rf"_{days}d_\d{{8}}" if days else ""
+        stale = re.compile(rf"{re.escape(_slug(product_name))}_\d+{suffix}_graph\.png")
+        for old_path in glob.glob(os.path.join(self.save_path, f"{glob.escape(_slug(product_name))}_*_graph.png")):
+            if old_path != path and stale.fullmatch(os.path.basename(old_path)):
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_service: Optional[RenderService] = None
+_service_lock = threading.Lock()
+
+
+def get_render_service() -> RenderService:
+    """Return the process-wide render service, starting it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            graph = config['graph']
+            _service = RenderService(
+                save_path=graph['save_path'],
+                max_workers=graph.get('render_workers', 2),
+                theme=graph.get('theme', 'ggplot'),
+            )
+        return _service
+
+
+def shutdown_render_service():
+    """Stop the render workers, if the service was ever started."""
+    if _service is not None:
+        _service.shutdown()
@@ -1,64 +1,87 @@
 import matplotlib
-import matplotlib.pyplot as plt
+import matplotlib.style
 import matplotlib.dates as mdates
-from datetime import datetime
-from database.database import DatabaseHandler
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from datetime import datetime, timedelta
 from config_loader import load_config
 import os
 
 # Load configuration from YAML file
 config = load_config()
-matplotlib.use('Agg')
 
-def plot_price_history(product_name, save_to_file: bool = True):
-    db = DatabaseHandler()
-    # Each row is (id, name, url, currency, price, timestamp)
-    data = db.fetch_data_by_name(product_name)
+# Above this many points the per-point price labels become unreadable
+MAX_ANNOTATED_POINTS = 40
 
-    save_path = config['graph']['save_path']
-    os.makedirs(save_path, exist_ok=True)
-    
+def draw_price_history(fig: Figure, product_name, granularity, data):
+    """Draw a price history chart on ``fig`` without touching pyplot state.
+
+    ``data`` rows are (timestamp, min_price, max_price, last_price, count) as
+    returned by ``DatabaseHandler.fetch_history``.
+    """
     # Parse timestamps and extract prices.
-    timestamps = [datetime.strptime(row[5], "%Y-%m-%d %H:%M:%S") for row in data]
-    prices = [row[4] for row in data]
-    
-    # Apply a style for a more appealing look
-    plt.style.use('ggplot')
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    
-    # Plot price history with markers
-    ax.plot(timestamps, prices, marker='o', linestyle='-', color='#0099ff', label='Price')
-    
+    timestamps = [datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S") for row in data]
+    prices = [row[1] for row in data]
+
+    ax = fig.subplots()
+
+    # Plot price history with markers (lowest price of each bucket for rollups)
+    label = f'Lowest price per {granularity}' if granularity else 'Price'
+    ax.plot(timestamps, prices, marker='o', linestyle='-', color='#0099ff', label=label)
+    if granularity:
+        ax.fill_between(timestamps, prices, [row[2] for row in data], color='#0099ff', alpha=0.15, label='Price range')
+
     # Annotate each data point with its price value
-    for x, y in zip(timestamps, prices):
-        ax.annotate(f'{y:.2f}', xy=(x, y), xytext=(0, 8), textcoords="offset points", ha="center", fontsize=10, color='black')
-    
-    
+    if len(data) <= MAX_ANNOTATED_POINTS:
+        for x, y in zip(timestamps, prices):
+            ax.annotate(f'{y:.2f}', xy=(x, y), xytext=(0, 8), textcoords="offset points", ha="center", fontsize=10, color='black')
+
     ax.set_title(f"Price History for {product_name}", fontsize=16)
     ax.set_xlabel("Timestamp", fontsize=12)
     ax.set_ylabel("Price", fontsize=12)
-    
+
     # Rotate and format x-axis ticks
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
     ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45)
-    
+    ax.tick_params(axis='x', labelrotation=45)
+
     ax.grid(True, which='both', linestyle='--', linewidth=0.5)
     ax.legend(fontsize=12)
-    
-    plt.tight_layout()
-    
+
+    fig.tight_layout()
+
+def render_price_history(path, product_name, granularity, data, theme: str = 'ggplot') -> str:
+    """Render the chart to a PNG with the Agg canvas and return its path.
+
+    The file is written under a temporary name and moved into place, so a
+    reader never sees a half-written image.
+    """
+    # Apply a style for a more appealing look
+    with matplotlib.style.context(theme):
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        draw_price_history(fig, product_name, granularity, data)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fig.savefig(tmp_path, format='png')
+    os.replace(tmp_path, path)
+    return path
+
+def plot_price_history(product_name, save_to_file: bool = True, days: int = None):
     if save_to_file:
-        filename = f"{product_name.replace(' ', '_')}_graph.png"
-        full_path = os.path.join(save_path, filename)
-        plt.savefig(full_path)
-        plt.close(fig)
-        return full_path
-    else:
-        plt.show()
-        return None
-    
+        # Rendered off-thread and cached per product and last observation
+        from analysis.render_service import get_render_service
+        return get_render_service().render(product_name, days).result()
+
+    from database.database import get_database
+    import matplotlib.pyplot as plt
+    start = datetime.utcnow() - timedelta(days=days) if days else None
+    granularity, data = get_database().fetch_history(product_name, start=start)
+    with matplotlib.style.context(config['graph'].get('theme', 'ggplot')):
+        fig = plt.figure(figsize=(12, 6))
+        draw_price_history(fig, product_name, granularity, data)
+    plt.show()
+    return None
+
 if __name__ == "__main__":
       # Required for the trend line calculation
-    plot_price_history("Fone de Ouvido Galaxy Buds FE")
\ No newline at end of file
+    plot_price_history("Fone de Ouvido Galaxy Buds FE")
@@ -0,0 +1,6 @@
+import os
+
+# Benchmarks run against the example config, never the user's config/config.yaml;
+# set PRICE_SCANNER_CONFIG to benchmark another one
+os.environ.setdefault('PRICE_SCANNER_CONFIG', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'example_config.yaml'))
@@ -0,0 +1,83 @@
+# benchmarks/import_benchmark.py
+#
+# Measure how long the project's entry points take to import in a fresh
+# interpreter, and which heavy dependencies each one pulls in. Run from the
+# repository root (config/example_config.yaml unless PRICE_SCANNER_CONFIG is set):
+#
+#     python -m benchmarks.import_benchmark [--repeat 5] [--top 10]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Entry points without import-time side effects (main.py opens the database)
+MODULES = [
+    'config_loader',
+    'scrapers',
+    'scrapers.engine',
+    'scrapers.worker',
+    'scheduler.job_queue',
+    'bot.telegram_bot',
+    'analysis.render_service',
+]
+
+# Dependencies that should only load when their subsystem is first used
+HEAVY = ['selenium', 'matplotlib', 'telegram', 'aiohttp', 'numpy', 'bs4', 'lxml']
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))\n"
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe(module: str):
+    """Import ``module`` in a new interpreter; return (seconds, heavy modules loaded)."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else '-'
+
+
+def slowest_imports(module: str, top: int):
+    """The ``top`` packages with the largest cumulative import time (-X importtime)."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        if '.' not in name.strip():
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time of the project entry points')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--top', type=int, default=0, help='also list the N slowest top-level imports')
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args()
+
+    print(f"{'module':28} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        times = [seconds for seconds, _ in runs]
+        print(f"{module:28} {statistics.median(times) * 1000:10.1f} {min(times) * 1000:8.1f}  {runs[-1][1]}")
+        if args.top:
+            for microseconds, name in slowest_imports(module, args.top):
+                print(f"    {microseconds / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
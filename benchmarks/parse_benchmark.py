@@ -0,0 +1,73 @@
+# benchmarks/parse_benchmark.py
+#
+# Compare full-document parsing with region-restricted parsing over the saved
+# HTML fixtures. Run from the repository root:
+#
+#     python -m benchmarks.parse_benchmark [--repeat 20]
+
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.mercadolivre_scraper import MercadoLivreScraper
+from scrapers.parsing import parse_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Fixture files are named "<site>_*.html"
+SCRAPERS = {
+    'amazon': AmazonScraper,
+    'mercadolivre': MercadoLivreScraper,
+}
+
+
+def measure(scraper, content: bytes, strainer, repeat: int):
+    """Return (mean seconds per page, peak bytes allocated, extracted values)."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        soup = parse_page(content, strainer)
+        scraper._extract_price(soup)
+        scraper._extract_product_title(soup)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    soup = parse_page(content, strainer)
+    values = (scraper._extract_price(soup), scraper._extract_product_title(soup))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full vs region-restricted parsing benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='parses per fixture and mode')
+    args = parser.parse_args()
+
+    identical = True
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        site = os.path.basename(path).split('_')[0]
+        if site not in SCRAPERS:
+            continue
+        scraper = SCRAPERS[site]()
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        full_time, full_peak, full_values = measure(scraper, content, None, args.repeat)
+        region_time, region_peak, region_values = measure(scraper, content, scraper._strainer, args.repeat)
+        identical = identical and full_values == region_values
+
+        print(f"{os.path.basename(path)} ({len(content) / 1024:.0f} KiB)")
+        print(f"  full parse:    {full_time * 1000:8.2f} ms  peak {full_peak / 1024:8.0f} KiB  -> {full_values}")
+        print(f"  regions parse: {region_time * 1000:8.2f} ms  peak {region_peak / 1024:8.0f} KiB  -> {region_values}")
+        print(f"  speedup {full_time / region_time:.1f}x, memory {full_peak / region_peak:.1f}x less")
+
+    if not identical:
+        print("ERROR: region parsing extracted different values than full parsing")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
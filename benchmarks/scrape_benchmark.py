@@ -0,0 +1,240 @@
+# benchmarks/scrape_benchmark.py
+#
+# Offline throughput and accuracy benchmark of the scrapers. The product pages
+# in benchmarks/fixtures are synthetic: the sites' price and title markup
+# (prices written as the sites display them, e.g. "R$ 3.799,00") padded with
+# filler to a typical page weight, not recordings of live pages. They are
+# replayed through _extract_price / _extract_product_title, and through the
+# full scrape_product path against a local HTTP server standing in for the
+# sites. Each site runs in its own process so its peak RSS can be reported.
+# Run from the repository root:
+#
+#     python -m benchmarks.scrape_benchmark [--repeat 50] [--update-baseline]
+#
+# Exits with status 1 when accuracy or throughput falls below the limits in
+# benchmarks/thresholds.yaml, relative to benchmarks/baseline.json.
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import yaml
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+EXPECTED_PATH = os.path.join(FIXTURES_DIR, 'expected.json')
+THRESHOLDS_PATH = os.path.join(BENCHMARKS_DIR, 'thresholds.yaml')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+
+def fixtures_by_site() -> Dict[str, List[str]]:
+    """Fixture files are named "<site>_*.html"."""
+    sites = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        sites.setdefault(os.path.basename(path).split('_')[0], []).append(path)
+    return sites
+
+
+class FixtureServer:
+    """Local HTTP server answering /<fixture file name> with the fixture page."""
+
+    def __init__(self, paths: List[str]):
+        pages = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages['/' + os.path.basename(path)] = f.read()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = pages.get(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{os.path.basename(path)}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {
+        'pages_per_sec': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(0.50), 3),
+        'p99_ms': round(percentile(0.99), 3),
+    }
+
+
+def is_correct(result: Tuple, expected: Dict) -> bool:
+    price, title = result
+    return price == expected.get('price') and (title or '').strip() == expected.get('title')
+
+
+def bench_extraction(scraper, paths: List[str], expected: Dict, repeat: int):
+    """Parse + extract each fixture ``repeat`` times, as the HTTP tier does."""
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    latencies, correct, total = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for name, content in pages:
+            start = time.perf_counter()
+            soup = scraper._parse(content)
+            result = (scraper._extract_price(soup), scraper._extract_product_title(soup))
+            latencies.append(time.perf_counter() - start)
+            correct += is_correct(result, expected.get(name, {}))
+            total += 1
+    return summarize(latencies, time.perf_counter() - started), correct / total
+
+
+def bench_scrape(scraper, paths: List[str], expected: Dict, repeat: int):
+    """Run scrape_product against the local stand-in server."""
+    server = FixtureServer(paths)
+    latencies, correct, total = [], 0, 0
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for path in paths:
+                start = time.perf_counter()
+                result = scraper.scrape_product(server.url(path))
+                latencies.append(time.perf_counter() - start)
+                ok = result['success'] and result['tier'] == 'http'
+                correct += ok and is_correct((result['price'], result['title']), expected.get(os.path.basename(path), {}))
+                total += 1
+        return summarize(latencies, time.perf_counter() - started), correct / total
+    finally:
+        server.stop()
+
+
+def peak_rss_kib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_site(site: str, paths: List[str], expected: Dict, repeat: int) -> Dict:
+    """Benchmark one site; runs in a fresh process."""
+    from config_loader import load_config
+    from scrapers import scraper as Scraper
+    from scrapers.rate_limiter import DomainLimiter
+    import scrapers  # noqa: F401  (registers the site scrapers)
+
+    # Measure parsing, not the page cache or politeness delays
+    config = load_config()
+    config.setdefault('cache', {})['enabled'] = False
+    config['scraping']['http_fast_path'] = True
+    scraper_class = next(cls for cls in Scraper.SCRAPER_REGISTRY.values() if cls.site == site)
+    scraper = scraper_class()
+    scraper.retry_attempts = 1
+    scraper.limiter = DomainLimiter(site, rate=1e9, max_rate=1e9, burst=1e9)
+
+    extraction, extraction_accuracy = bench_extraction(scraper, paths, expected, repeat)
+    scrape, scrape_accuracy = bench_scrape(scraper, paths, expected, repeat)
+    return {
+        'extract': dict(extraction, accuracy=extraction_accuracy),
+        'scrape': dict(scrape, accuracy=scrape_accuracy),
+        'peak_rss_kib': peak_rss_kib(),
+    }
+
+
+def check(results: Dict, thresholds: Dict, baseline: Dict) -> List[str]:
+    """Return a description of every threshold the results violate."""
+    failures = []
+    min_accuracy = thresholds.get('min_accuracy', 1.0)
+    max_drop = thresholds.get('max_throughput_drop', 0.3)
+    max_rss_growth = thresholds.get('max_rss_growth', 0.5)
+    for site, result in results.items():
+        for mode in ('extract', 'scrape'):
+            if result[mode]['accuracy'] < min_accuracy:
+                failures.append(f"{site} {mode}: accuracy {result[mode]['accuracy']:.0%} < {min_accuracy:.0%}")
+            base = baseline.get(site, {}).get(mode)
+            if base and result[mode]['pages_per_sec'] < base['pages_per_sec'] * (1 - max_drop):
+                failures.append(f"{site} {mode}: {result[mode]['pages_per_sec']} pages/sec is more than "
+                                f"{max_drop:.0%} below the baseline {base['pages_per_sec']}")
+        base_rss = baseline.get(site, {}).get('peak_rss_kib')
+        if base_rss and result['peak_rss_kib'] and result['peak_rss_kib'] > base_rss * (1 + max_rss_growth):
+            failures.append(f"{site}: peak RSS {result['peak_rss_kib']} KiB is more than "
+                            f"{max_rss_growth:.0%} above the baseline {base_rss} KiB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper throughput and accuracy benchmark')
+    parser.add_argument('--repeat', type=int, default=50, help='passes over the fixtures per mode')
+    parser.add_argument('--update-baseline', action='store_true', help='save these results as the new baseline')
+    args = parser.parse_args()
+
+    with open(EXPECTED_PATH) as f:
+        expected = json.load(f)
+    with open(THRESHOLDS_PATH) as f:
+        thresholds = yaml.safe_load(f) or {}
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    # A fresh interpreter per site, so peak RSS is the site's own
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for site, paths in fixtures_by_site().items():
+        with context.Pool(1) as pool:
+            results[site] = pool.apply(run_site, (site, paths, expected, args.repeat))
+
+    print(f"{'site':14} {'mode':8} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'accuracy':>9} {'peak RSS':>10}")
+    for site, result in results.items():
+        for mode in ('extract', 'scrape'):
+            r = result[mode]
+            print(f"{site:14} {mode:8} {r['pages_per_sec']:9.1f} {r['p50_ms']:8.2f} {r['p99_ms']:8.2f} "
+                  f"{r['accuracy']:9.0%} {result['peak_rss_kib'] or 0:7d} KiB")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return
+
+    failures = check(results, thresholds, baseline)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional
+from database.database import DatabaseHandler, get_database
+from config_loader import load_config
+from monitoring import metrics
+
+if TYPE_CHECKING:
+    from telegram import Bot
+
+# Load configuration from YAML file
+config = load_config()
+
+# Telegram API limits
+MAX_MEDIA_GROUP = 10
+MAX_CAPTION = 1024
+MAX_MESSAGE = 4096
+
+
+class TokenBucket:
+    """Asynchronous token bucket refilled at ``rate`` tokens per second.
+
+    Acquiring more tokens than the bucket holds is allowed once it is full;
+    the balance goes negative and later callers wait for it to be repaid, so
+    a media group of ten photos counts as ten messages.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            needed = min(tokens, self.capacity)
+            self._refill()
+            while self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+class DeliveryQueue:
+    """Deliver alerts from the persistent outbox with one long-lived bot.
+
+    Messages are written to the database first, so nothing is lost when
+    Telegram is unreachable or the process restarts. ``flush`` sends every
+    due message: photos for the same chat go out as media groups, text-only
+    messages are merged into a digest, and every request passes a per-chat
+    and a global token bucket. Failed messages are retried with exponential
+    backoff (or after Telegram's ``retry_after``) until ``max_attempts``.
+    """
+
+    def __init__(self, token: str, chat_id, db: Optional[DatabaseHandler] = None,
+                 base_url: Optional[str] = None, chat_rate: float = 1.0, chat_burst: int = 1,
+                 global_rate: float = 30.0, max_attempts: int = 5,
+                 backoff_base: float = 30.0, backoff_max: float = 3600.0):
+        self.token = token
+        self.chat_id = str(chat_id)
+        self.db = db or get_database()
+        self.base_url = base_url
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._bot: Optional['Bot'] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def _get_bot(self) -> 'Bot':
+        if self._bot is None:
+            # python-telegram-bot is only imported once there is something to send
+            from telegram import Bot
+
+            kwargs = {}
+            if self.base_url:
+                kwargs['base_url'] = self.base_url
+                kwargs['base_file_url'] = self.base_url.replace('/bot', '/file/bot')
+            bot = Bot(token=self.token, **kwargs)
+            await bot.initialize()
+            self._bot = bot
+        return self._bot
+
+    async def _throttle(self, chat_id: str, messages: int = 1):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        await bucket.acquire(messages)
+        await self._global_bucket.acquire(messages)
+
+    def enqueue(self, caption: str, photo_path: Optional[str] = None, chat_id=None) -> int:
+        """Store a message in the outbox; it is sent on the next ``flush``."""
+        return self.db.add_to_outbox(chat_id or self.chat_id, caption, photo_path)
+
+    def _retry_at(self, attempts: int, error: Exception) -> float:
+        from telegram.error import RetryAfter
+        if isinstance(error, RetryAfter):
+            delay = error.retry_after
+            delay = delay.total_seconds() if hasattr(delay, 'total_seconds') else float(delay)
+        else:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempts)
+            delay += random.uniform(0, delay / 10)
+        return time.time() + delay
+
+    def _failed(self, rows, error: Exception):
+        from telegram.error import BadRequest, Forbidden, InvalidToken
+        # These fail the same way on every retry
+        permanent = isinstance(error, (BadRequest, Forbidden, InvalidToken))
+        max_attempts = 1 if permanent else self.max_attempts
+        attempts = max(row[4] for row in rows)
+        logging.error(f"Telegram delivery of {len(rows)} message(s) failed (attempt {attempts + 1}): {error}")
+        metrics.inc('telegram_messages_total', len(rows), outcome='failed')
+        self.db.mark_outbox_retry([row[0] for row in rows], str(error),
+                                  self._retry_at(attempts, error), max_attempts)
+
+    async def _send_photos(self, bot: 'Bot', chat_id: str, rows) -> int:
+        from telegram import InputMediaPhoto
+        from telegram.error import TelegramError
+        for start in range(0, len(rows), MAX_MEDIA_GROUP):
+            batch = rows[start:start + MAX_MEDIA_GROUP]
+            try:
+                await self._throttle(chat_id, len(batch))
+                with metrics.span('telegram_send'):
+                    if len(batch) == 1:
+                        with open(batch[0][3], 'rb') as photo:
+                            await bot.send_photo(chat_id=chat_id, photo=photo, caption=batch[0][2][:MAX_CAPTION])
+                    else:
+                        media = []
+                        for row in batch:
+                            with open(row[3], 'rb') as photo:
+                                media.append(InputMediaPhoto(media=photo.read(), caption=row[2][:MAX_CAPTION]))
+                        await bot.send_media_group(chat_id=chat_id, media=media)
+            except (TelegramError, OSError) as e:
+                # Stop at the first failure so later batches keep their order
+                self._failed(rows[start:], e)
+                return start
+            self.db.mark_outbox_sent([row[0] for row in batch])
+            metrics.inc('telegram_messages_total', len(batch), outcome='sent')
+        return len(rows)
+
+    async def _send_digest(self, bot: 'Bot', chat_id: str, rows) -> int:
+        from telegram.error import TelegramError
+        # Pack as many messages as fit into each Telegram message
+        chunks: List[List] = [[]]
+        length = 0
+        for row in rows:
+            text = row[2][:MAX_MESSAGE]
+            if chunks[-1] and length + len(text) + 2 > MAX_MESSAGE:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(row)
+            length += len(text) + 2
+
+        sent = 0
+        for chunk in chunks:
+            try:
+                await self._throttle(chat_id)
+                with metrics.span('telegram_send'):
+                    await bot.send_message(chat_id=chat_id, text="\n\n".join(row[2][:MAX_MESSAGE] for row in chunk))
+            except TelegramError as e:
+                self._failed(rows[sent:], e)
+                return sent
+            self.db.mark_outbox_sent([row[0] for row in chunk])
+            metrics.inc('telegram_messages_total', len(chunk), outcome='sent')
+            sent += len(chunk)
+        return sent
+
+    async def flush(self, limit: int = 100) -> int:
+        """Send every due message in the outbox and return how many were delivered."""
+        async with self._flush_lock:
+            rows = self.db.fetch_due_outbox(time.time(), limit)
+            if not rows:
+                return 0
+            from telegram.error import TelegramError
+            try:
+                bot = await self._get_bot()
+            except TelegramError as e:
+                self._failed(rows, e)
+                return 0
+
+            by_chat = OrderedDict()
+            for row in rows:
+                by_chat.setdefault(row[1], []).append(row)
+
+            delivered = 0
+            for chat_id, chat_rows in by_chat.items():
+                # Alerts whose chart is missing still go out, as text
+                photos = [row for row in chat_rows if row[3] and os.path.exists(row[3])]
+                texts = [row for row in chat_rows if not (row[3] and os.path.exists(row[3]))]
+                if photos:
+                    delivered += await self._send_photos(bot, chat_id, photos)
+                if texts:
+                    delivered += await self._send_digest(bot, chat_id, texts)
+            logging.info(f"Delivered {delivered} of {len(rows)} queued Telegram message(s)")
+            return delivered
+
+    async def close(self):
+        if self._bot is not None:
+            await self._bot.shutdown()
+            self._bot = None
+
+
+_queue: Optional[DeliveryQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_delivery_queue() -> DeliveryQueue:
+    """Return the process-wide delivery queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            telegram = config['telegram']
+            _queue = DeliveryQueue(
+                token=telegram['bot_token'],
+                chat_id=telegram['chat_id'],
+                base_url=telegram.get('base_url'),
+                chat_rate=telegram.get('messages_per_second', 1.0),
+                chat_burst=telegram.get('burst', 1),
+                global_rate=telegram.get('global_messages_per_second', 30.0),
+                max_attempts=telegram.get('max_attempts', 5),
+                backoff_base=telegram.get('retry_backoff', 30.0),
+            )
+        return _queue
@@ -0,0 +1,138 @@
+"""Local stand-in for the Telegram Bot API, for exercising the delivery queue.
+
+Point ``telegram.base_url`` at ``http://127.0.0.1:<port>/bot`` and every
+request is answered locally and recorded in ``FakeBotAPI.requests``.
+``fail_next`` makes the next requests fail with a 429 (or any other) error,
+so throttling and retries can be checked without a real bot.
+
+    python -m bot.fake_bot_api --port 8081
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+
+def _chat_id(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
+class FakeBotAPI:
+    """Threaded HTTP server answering the Bot API methods the delivery queue uses."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.requests: List[Dict] = []
+        self._failures: List[Dict] = []
+        self._message_id = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> 'FakeBotAPI':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fail_next(self, count: int = 1, error_code: int = 429, retry_after: int = 1):
+        """Answer the next ``count`` requests with an error."""
+        with self._lock:
+            self._failures.extend({'error_code': error_code, 'retry_after': retry_after} for _ in range(count))
+
+    def sent(self, method: str = None) -> List[Dict]:
+        return [r for r in self.requests if method is None or r['method'] == method]
+
+    def _message(self, chat_id) -> Dict:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        return {'message_id': message_id, 'date': int(time.time()),
+                'chat': {'id': _chat_id(chat_id), 'type': 'private'}}
+
+    def _answer(self, method: str, params: Dict, photos: int):
+        with self._lock:
+            failure = self._failures.pop(0) if self._failures else None
+            self.requests.append({'method': method, 'params': params, 'photos': photos,
+                                  'time': time.monotonic(), 'failed': failure is not None})
+        if failure:
+            body = {'ok': False, 'error_code': failure['error_code'],
+                    'description': f"Error {failure['error_code']}"}
+            if failure['error_code'] == 429:
+                body['description'] = f"Too Many Requests: retry after {failure['retry_after']}"
+                body['parameters'] = {'retry_after': failure['retry_after']}
+            return failure['error_code'], body
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+        elif method == 'sendMediaGroup':
+            result = [self._message(params.get('chat_id')) for _ in range(max(photos, 1))]
+        elif method in ('sendMessage', 'sendPhoto'):
+            result = self._message(params.get('chat_id'))
+        else:
+            result = True
+        return 200, {'ok': True, 'result': result}
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                content_type = self.headers.get('Content-Type', '')
+                method = self.path.rstrip('/').rsplit('/', 1)[-1]
+                if 'multipart/form-data' in content_type:
+                    # Only the plain form fields matter; attached files are counted
+                    text = body.decode('latin-1')
+                    params = dict(re.findall(r'name="(\w+)"\r\n\r\n(.*?)\r\n--', text, re.S))
+                    photos = len(re.findall(r'name="[^"]*"; filename=', text))
+                elif 'json' in content_type:
+                    params = json.loads(body or b'{}')
+                    photos = 0
+                else:
+                    params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+                    photos = 0
+                if method == 'sendMediaGroup' and isinstance(params.get('media'), str):
+                    photos = len(json.loads(params['media']))
+
+                status, answer = api._answer(method, params, photos)
+                payload = json.dumps(answer).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a local fake Telegram Bot API")
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args()
+    api = FakeBotAPI(port=args.port).start()
+    print(f"Fake Bot API listening on {api.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        api.stop()
@@ -1,27 +1,23 @@
-import asyncio
 import logging
-from telegram import Bot
-from config_loader import load_config
+from typing import Optional
+from bot.delivery import get_delivery_queue
+from scheduler.event_loop import run_async
 
-# Load config for bot credentials and chat_id
-config = load_config()
-BOT_TOKEN = config['telegram']['bot_token']
-CHAT_ID = config['telegram']['chat_id']
+def queue_alert(message: str, photo_path: Optional[str] = None) -> int:
+    """Store an alert in the outbox without sending it yet."""
+    return get_delivery_queue().enqueue(message, photo_path)
 
-async def send_alert_async(message: str, photo_path: str):
-    bot = Bot(token=BOT_TOKEN)
+def deliver_pending() -> int:
+    """Send every due alert in the outbox on the shared event loop."""
     try:
-        with open(photo_path, "rb") as photo:
-            await bot.send_photo(chat_id=CHAT_ID, photo=photo, caption=message)
+        return run_async(get_delivery_queue().flush())
     except Exception as e:
-        logging.error("Failed to send Telegram alert: " + str(e))
+        logging.error(f"Telegram delivery failed: {e}")
+        return 0
 
-def send_alert(message: str, photo_path: str):
-    loop = asyncio.new_event_loop()
-    try:
-        loop.run_until_complete(send_alert_async(message, photo_path))
-    finally:
-        loop.close()
+def send_alert(message: str, photo_path: Optional[str] = None):
+    queue_alert(message, photo_path)
+    deliver_pending()
 
 if __name__ == '__main__':
-    send_alert("Test alert", "graph.png")
\ No newline at end of file
+    send_alert("Test alert", "graph.png")
@@ -0,0 +1,219 @@
+import os
+import csv
+import json
+import hashlib
+import logging
+import argparse
+from itertools import groupby, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import yaml
+
+from config_loader import load_config, DEFAULT_CONFIG_PATH
+from database.database import CatalogEntry, DatabaseHandler, get_database
+from scrapers import scraper as Scraper
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+class CatalogError(Exception):
+    """A catalog source could not be read; the previous catalog stays in effect."""
+
+
+# Readers by file extension; each yields product dicts ({'name': .., 'urls': [..]})
+CATALOG_READERS: Dict[str, Callable[[str], Iterator[Dict]]] = {}
+
+def register_reader(*extensions):
+    def decorator(func):
+        for extension in extensions:
+            CATALOG_READERS[extension] = func
+        return func
+    return decorator
+
+
+@register_reader('.yaml', '.yml')
+def read_yaml(path: str) -> Iterator[Dict]:
+    """A list of products, or a mapping with a ``products:`` list (like config.yaml).
+
+    YAML has no record boundaries, so the file is parsed whole; use CSV or
+    JSONL for very large catalogs.
+    """
+    with open(path) as f:
+        data = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    if isinstance(data, dict):
+        data = data.get('products')
+    yield from data or []
+
+
+@register_reader('.csv')
+def read_csv(path: str) -> Iterator[Dict]:
+    """Rows with a ``name`` and a ``url`` (or space-separated ``urls``) column.
+
+    Consecutive rows with the same name are one product with several URLs.
+    """
+    with open(path, newline='') as f:
+        for name, rows in groupby(csv.DictReader(f), key=lambda row: (row.get('name') or '').strip()):
+            urls = []
+            for row in rows:
+                urls.extend((row.get('urls') or row.get('url') or '').split())
+            # Rows without a name or URL are logged and skipped by Catalog._entry
+            yield {'name': name, 'urls': urls}
+
+
+@register_reader('.jsonl', '.ndjson')
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """One product object per line."""
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.error(f"Skipping line {number} of {path}: {e}")
+
+
+def read_catalog(path: str) -> Iterator[Dict]:
+    reader = CATALOG_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"Unsupported catalog file: {path}")
+    return reader(path)
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Catalog:
+    """The watch list, imported from YAML, CSV or JSONL files into the database.
+
+    Files are streamed in chunks of ``chunk_size`` products, each upserted in
+    one transaction, so a catalog of any size is imported in bounded memory.
+    Every entry carries a hash of its contents: unchanged entries are only
+    stamped as seen, changed ones get their listings replaced, and products
+    missing from the files stop being scheduled. ``refresh`` re-imports when
+    a source file changed on disk, so edits apply to a running scheduler.
+    """
+
+    def __init__(self, db: Optional[DatabaseHandler] = None, sources: Optional[List[str]] = None,
+                 chunk_size: int = 500):
+        self.db = db or get_database()
+        self.sources = sources or [DEFAULT_CONFIG_PATH]
+        self.chunk_size = chunk_size
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+
+    def _stamp(self, path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _entry(self, product: Dict) -> Optional[CatalogEntry]:
+        if not isinstance(product, dict):
+            logging.error(f"Skipping catalog entry that is not a mapping: {product!r}")
+            return None
+        name = product.get('name')
+        urls = product.get('urls') or product.get('url') or []
+        if isinstance(urls, str):
+            urls = [urls]
+        if not name or not isinstance(name, str) or not isinstance(urls, list) or not urls:
+            logging.error(f"Catalog entry without a name or URLs: {product}")
+            return None
+
+        listings = []
+        for url in dict.fromkeys(urls):
+            try:
+                if not isinstance(url, str):
+                    raise ValueError(f"Not a URL: {url!r}")
+                listings.append((url, Scraper.get_scraper(url).currency))
+            except ValueError as e:
+                logging.error(f"Skipping catalog URL of {name}: {e}")
+        digest = hashlib.sha1(json.dumps([name, listings]).encode()).hexdigest()
+        return name, digest, listings
+
+    def _entries(self) -> Iterator[CatalogEntry]:
+        for path in self.sources:
+            valid = 0
+            try:
+                for product in read_catalog(path):
+                    entry = self._entry(product)
+                    if entry is not None:
+                        valid += 1
+                        yield entry
+            except (OSError, ValueError, yaml.YAMLError, csv.Error) as e:
+                raise CatalogError(f"Cannot read catalog source {path}: {e}") from e
+            # Most likely a file caught half written; importing it would deactivate every product
+            if not valid:
+                raise CatalogError(f"Catalog source {path} has no valid entries")
+
+    def load(self) -> Dict[str, int]:
+        """Import every source file; products not in any of them are deactivated.
+
+        Bad entries are logged and skipped. A source that cannot be read at
+        all, or has no valid entry (e.g. an empty file), raises
+        ``CatalogError`` before anything is deactivated, so the previous
+        catalog stays scheduled (plus any entries imported before the
+        failure).
+        """
+        try:
+            stamps = {path: self._stamp(path) for path in self.sources}
+        except OSError as e:
+            raise CatalogError(f"Catalog source unavailable: {e}") from e
+        # Even a failed load is not retried until a source changes again
+        self._stamps = stamps
+        generation = self.db.fetch_catalog_generation() + 1
+        stats = {'changed': 0, 'unchanged': 0}
+        for chunk in chunked(self._entries(), self.chunk_size):
+            # A product listed twice in the same chunk keeps its last entry
+            chunk = list({entry[0]: entry for entry in chunk}.values())
+            changed, unchanged = self.db.import_catalog(chunk, generation)
+            stats['changed'] += changed
+            stats['unchanged'] += unchanged
+        stats['removed'] = self.db.deactivate_catalog(generation)
+
+        logging.info(f"Catalog loaded from {', '.join(self.sources)}: {stats['changed']} new or changed, "
+                     f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+        return stats
+
+    def refresh(self) -> bool:
+        """Re-import the catalog if a source file changed since the last load."""
+        try:
+            changed = any(self._stamps.get(path) != self._stamp(path) for path in self.sources)
+            if changed:
+                self.load()
+        except (OSError, CatalogError) as e:
+            logging.error(f"Catalog reload failed, keeping the current catalog: {e}")
+            return False
+        return changed
+
+
+def get_catalog(db: Optional[DatabaseHandler] = None) -> Catalog:
+    """Build the catalog from the ``catalog`` section of the config.
+
+    Without ``catalog.sources`` the ``products:`` list of the config file
+    itself is the catalog.
+    """
+    options = config.get('catalog') or {}
+    return Catalog(db=db, sources=options.get('sources'), chunk_size=options.get('chunk_size', 500))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the product catalog into the database")
+    parser.add_argument('sources', nargs='*', help="YAML, CSV or JSONL files (default: catalog.sources)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+    catalog = get_catalog()
+    if args.sources:
+        catalog.sources = args.sources
+    print(catalog.load())
+    catalog.db.close()
+
+
+if __name__ == '__main__':
+    main()
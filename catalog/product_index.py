@@ -0,0 +1,172 @@
+import re
+import time
+import logging
+import threading
+import unicodedata
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from database.database import DatabaseHandler, get_database
+from scrapers import scraper as Scraper
+
+# Words that do not tell products apart (pt/en), dropped from normalized titles
+TITLE_STOPWORDS = {'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'com', 'para', 'em',
+                   'the', 'and', 'with', 'for', 'of'}
+
+
+def normalize_title(title: Optional[str]) -> Optional[str]:
+    """Case-, accent-, punctuation- and word-order-insensitive key of a product title."""
+    if not title:
+        return None
+    text = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode().lower()
+    words = sorted(set(re.findall(r'[a-z0-9]+', text)) - TITLE_STOPWORDS)
+    return ' '.join(words) or None
+
+
+class Offer(NamedTuple):
+    price: float
+    currency: str
+    url: str
+    site: str
+    checked_at: float
+
+
+class ProductIndex:
+    """Canonical product identity and the best current offer of every product.
+
+    Listings resolve to a canonical product by their site id (ASIN, MLB id),
+    then by normalized title, and otherwise start a product of their own,
+    named after the catalog entry. Each listing result updates its offer and
+    the product's best offer in place, so ``best_offer`` is a dict lookup;
+    only when the current best gets worse are the product's other offers
+    looked at again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_site_id: Dict[Tuple[str, str], str] = {}
+        self._by_title: Dict[str, str] = {}
+        # Catalog names merged into another canonical product
+        self._aliases: Dict[str, str] = {}
+        self._offers: Dict[str, Dict[str, Offer]] = {}
+        self._best: Dict[str, Offer] = {}
+
+    def _site_id(self, url: str) -> Optional[Tuple[str, str]]:
+        try:
+            scraper = Scraper.get_scraper(url)
+        except ValueError:
+            return None
+        product_id = scraper.get_product_id(url)
+        return (scraper.site, product_id) if product_id else None
+
+    def _site(self, url: str) -> str:
+        try:
+            return Scraper.get_scraper(url).site
+        except ValueError:
+            return ''
+
+    def _resolve(self, url: str, title: Optional[str], name: Optional[str]) -> str:
+        site_id = self._site_id(url)
+        key = normalize_title(title)
+        canonical = (self._by_site_id.get(site_id) or self._by_title.get(key)
+                     or self._aliases.get(name) or name or url)
+        if site_id:
+            self._by_site_id.setdefault(site_id, canonical)
+        if key:
+            self._by_title.setdefault(key, canonical)
+        if name and name != canonical and self._aliases.get(name) != canonical:
+            logging.info(f"Product {name} matched {canonical} by {url}")
+            self._aliases[name] = canonical
+            self._merge(name, canonical)
+        return canonical
+
+    def _merge(self, name: str, canonical: str):
+        """Fold everything already known under ``name`` into ``canonical``."""
+        for mapping in (self._by_site_id, self._by_title, self._aliases):
+            for key, value in mapping.items():
+                if value == name:
+                    mapping[key] = canonical
+        self._best.pop(name, None)
+        offers = self._offers.pop(name, None)
+        if offers:
+            self._offers.setdefault(canonical, {}).update(offers)
+            self._recompute(canonical)
+
+    def resolve(self, url: str, title: Optional[str] = None, name: Optional[str] = None) -> str:
+        """Canonical product of a listing, remembering its site id and title."""
+        with self._lock:
+            return self._resolve(url, title, name)
+
+    def update(self, name: str, url: str, result: Optional[Dict], now: Optional[float] = None) -> Optional[Offer]:
+        """Fold one listing result into the index; returns the product's best offer.
+
+        A failed scrape keeps the listing's last offer; a listing scraped
+        without a price (out of stock) no longer offers the product.
+        """
+        if not result or not result.get('success'):
+            return self.best_offer(name)
+        now = time.time() if now is None else now
+        with self._lock:
+            canonical = self._resolve(url, result.get('title'), name)
+            offers = self._offers.setdefault(canonical, {})
+            best = self._best.get(canonical)
+            if result.get('price') is None:
+                offers.pop(url, None)
+                if best is not None and best.url == url:
+                    self._recompute(canonical)
+            else:
+                offer = Offer(result['price'], result.get('currency'), url, self._site(url), now)
+                offers[url] = offer
+                if best is None or offer.price <= best.price:
+                    self._best[canonical] = offer
+                elif best.url == url:
+                    # The best offer got more expensive; another listing may be cheaper now
+                    self._recompute(canonical)
+            return self._best.get(canonical)
+
+    def _recompute(self, canonical: str):
+        offers = self._offers.get(canonical)
+        if offers:
+            self._best[canonical] = min(offers.values(), key=lambda offer: offer.price)
+        else:
+            self._best.pop(canonical, None)
+
+    def best_offer(self, name: str) -> Optional[Offer]:
+        """Lowest current price of a product across all its listings and sites."""
+        with self._lock:
+            return self._best.get(self._aliases.get(name, name))
+
+    def load(self, rows: Iterable[Tuple[str, str, Optional[str], Optional[float], Optional[float], Optional[str]]]):
+        """Rebuild the index from (name, url, currency, last_price, last_checked_at, last_title) rows.
+
+        Listings are matched by the same site ids and stored titles as live
+        results, so the rebuilt products do not depend on when it runs.
+        """
+        with self._lock:
+            self._by_site_id.clear()
+            self._by_title.clear()
+            self._aliases.clear()
+            self._offers.clear()
+            self._best.clear()
+            for name, url, currency, price, checked_at, title in rows:
+                canonical = self._resolve(url, title, name)
+                offers = self._offers.setdefault(canonical, {})
+                if price is None:
+                    continue
+                offers[url] = Offer(price, currency, url, self._site(url), checked_at or 0.0)
+                best = self._best.get(canonical)
+                if best is None or price < best.price:
+                    self._best[canonical] = offers[url]
+
+
+_index: Optional[ProductIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_product_index(db: Optional[DatabaseHandler] = None) -> ProductIndex:
+    """Return the process-wide index, seeded from the active listings on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProductIndex()
+            _index.load((db or get_database()).fetch_listing_offers())
+        return _index
@@ -1,9 +1,27 @@
 # config_loader.py
 
+import os
+import threading
 import yaml
 
-def load_config(file_path="config/config.yaml"):
-    with open('config/config.yaml') as f:
-        config = yaml.safe_load(f)
-    
-    return config
\ No newline at end of file
+DEFAULT_CONFIG_PATH = os.environ.get('PRICE_SCANNER_CONFIG', 'config/config.yaml')
+
+# Parsed configs by path, so every module shares one parse of the YAML file
+_configs = {}
+_configs_lock = threading.Lock()
+
+def load_config(file_path=None):
+    """Return the parsed configuration, reading the file only on first use."""
+    file_path = file_path or DEFAULT_CONFIG_PATH
+    with _configs_lock:
+        if file_path not in _configs:
+            with open(file_path) as f:
+                _configs[file_path] = yaml.safe_load(f)
+        return _configs[file_path]
+
+def reload_config(file_path=None):
+    """Drop the cached configuration and parse the file again."""
+    file_path = file_path or DEFAULT_CONFIG_PATH
+    with _configs_lock:
+        _configs.pop(file_path, None)
+    return load_config(file_path)
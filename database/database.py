@@ -1,51 +1,739 @@
+import queue
+import logging
 import sqlite3
+import threading
 from contextlib import closing
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from typing import Iterable, List, Optional, Tuple
+from monitoring import metrics
+
+# Row accepted by insert_many: (name, url, currency, price)
+Row = Tuple[str, str, str, float]
+
+# Bumped whenever the schema changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 7
+
+# Catalog entry accepted by import_catalog: (name, content hash, [(url, currency), ...])
+CatalogEntry = Tuple[str, str, List[Tuple[str, str]]]
+
+# Timestamps are stored as UTC text in SQLite's CURRENT_TIMESTAMP format
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MIN_TIMESTAMP = "0000-00-00 00:00:00"
+MAX_TIMESTAMP = "9999-12-31 23:59:59"
+
+# Rollup granularities and the longest chart span each one is used for.
+# Anything longer than the last span uses the coarsest rollup.
+ROLLUP_HOUR = 'hour'
+ROLLUP_DAY = 'day'
+ROLLUP_WEEK = 'week'
+ROLLUP_SPANS = [
+    (None, timedelta(days=2)),          # raw observations
+    (ROLLUP_HOUR, timedelta(days=31)),
+    (ROLLUP_DAY, timedelta(days=366)),
+    (ROLLUP_WEEK, None),
+]
+
+def bucket_start(timestamp: str, granularity: str) -> str:
+    """Start of the rollup bucket that ``timestamp`` falls in."""
+    moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    if granularity == ROLLUP_HOUR:
+        moment = moment.replace(minute=0, second=0)
+    elif granularity == ROLLUP_DAY:
+        moment = moment.replace(hour=0, minute=0, second=0)
+    elif granularity == ROLLUP_WEEK:
+        moment = moment.replace(hour=0, minute=0, second=0) - timedelta(days=moment.weekday())
+    else:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+def choose_granularity(span: timedelta) -> Optional[str]:
+    """Pick the coarsest-needed rollup for a chart span; None means raw rows."""
+    for granularity, max_span in ROLLUP_SPANS:
+        if max_span is None or span <= max_span:
+            return granularity
+    return ROLLUP_WEEK
+
+def _format_time(value, default: str) -> str:
+    if value is None:
+        return default
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return str(value)
 
 class DatabaseHandler:
+    """SQLite access through one long-lived connection.
+
+    The connection runs in WAL mode so readers (charts) never block the
+    writer. Writes can go straight through ``insert_many`` or be queued with
+    ``enqueue``/``enqueue_many``; queued rows are written in batches by a
+    background thread so callers never wait on disk.
+    """
+
     def __init__(self, db_name='scraper_data.db'):
         self.db_name = db_name
+        self._lock = threading.RLock()
+        # (name, url) -> (product_id, listing_id)
+        self._ids = {}
+        self._conn = self._create_connection()
         self._create_tables()
 
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_behind, name='db-writer', daemon=True)
+        self._writer.start()
+
     def _create_connection(self):
-        return sqlite3.connect(self.db_name)
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-16000')  # ~16 MB page cache
+        conn.execute('PRAGMA busy_timeout=5000')
+        return conn
 
     def _create_tables(self):
-        with self._create_connection() as conn:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS scraper_data (
-                        id INTEGER PRIMARY KEY,
-                        name TEXT,
-                        url TEXT,
-                        currency TEXT,
-                        price REAL NOT NULL,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                conn.commit()
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('PRAGMA user_version')
+            version = cursor.fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+
+            # Each step moves the schema from version i to i + 1
+            migrations = [self._create_schema, self._create_rollups, self._add_alert_state, self._create_outbox,
+                          self._add_listing_schedule, self._add_catalog, self._add_listing_title]
+            try:
+                cursor.execute('BEGIN')
+                for migrate in migrations[version:]:
+                    migrate(cursor)
+                cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                cursor.execute('COMMIT')
+            except sqlite3.Error:
+                cursor.execute('ROLLBACK')
+                self._ids.clear()
+                raise
+
+    def _create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS listings (
+                id INTEGER PRIMARY KEY,
+                product_id INTEGER NOT NULL REFERENCES products (id),
+                url TEXT NOT NULL,
+                site TEXT,
+                currency TEXT,
+                UNIQUE (product_id, url)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS observations (
+                id INTEGER PRIMARY KEY,
+                product_id INTEGER NOT NULL REFERENCES products (id),
+                listing_id INTEGER NOT NULL REFERENCES listings (id),
+                price REAL NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_observations_product_time
+            ON observations (product_id, timestamp)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_observations_listing_time
+            ON observations (listing_id, timestamp)
+        ''')
+
+        self._migrate_legacy(cursor)
+
+        # Read-only view with the old flat row layout, for existing callers
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS scraper_data AS
+            SELECT o.id, p.name, l.url, l.currency, o.price, o.timestamp
+            FROM observations o
+            JOIN products p ON p.id = o.product_id
+            JOIN listings l ON l.id = o.listing_id
+        ''')
+
+    def _create_rollups(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_rollups (
+                product_id INTEGER NOT NULL REFERENCES products (id),
+                listing_id INTEGER NOT NULL REFERENCES listings (id),
+                granularity TEXT NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                min_price REAL NOT NULL,
+                max_price REAL NOT NULL,
+                last_price REAL NOT NULL,
+                last_timestamp DATETIME NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (product_id, granularity, bucket_start, listing_id)
+            ) WITHOUT ROWID
+        ''')
+
+        # Backfill from the existing history
+        cursor.execute('SELECT id, product_id, listing_id, price, timestamp FROM observations ORDER BY id')
+        self._update_rollups(cursor, cursor.fetchall())
+
+    def _add_alert_state(self, cursor):
+        # NULL means the stock state is not known yet
+        cursor.execute('ALTER TABLE products ADD COLUMN in_stock INTEGER')
+        cursor.execute('ALTER TABLE products ADD COLUMN last_alert_at DATETIME')
+
+    def _create_outbox(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                chat_id TEXT NOT NULL,
+                caption TEXT NOT NULL,
+                photo_path TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)
+        ''')
+
+    def _add_listing_schedule(self, cursor):
+        # A listing with next_due_at = 0 is due immediately
+        cursor.execute('ALTER TABLE listings ADD COLUMN next_due_at REAL NOT NULL DEFAULT 0')
+        cursor.execute('ALTER TABLE listings ADD COLUMN check_interval REAL')
+        cursor.execute('ALTER TABLE listings ADD COLUMN last_checked_at REAL')
+        cursor.execute('ALTER TABLE listings ADD COLUMN last_price REAL')
+        cursor.execute('ALTER TABLE listings ADD COLUMN failures INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_listings_due ON listings (next_due_at)')
+
+    def _add_catalog(self, cursor):
+        # Products and listings removed from the catalog are kept, with their
+        # history, but no longer scheduled
+        cursor.execute('ALTER TABLE products ADD COLUMN active INTEGER NOT NULL DEFAULT 1')
+        cursor.execute('ALTER TABLE products ADD COLUMN catalog_hash TEXT')
+        cursor.execute('ALTER TABLE products ADD COLUMN catalog_generation INTEGER')
+        cursor.execute('ALTER TABLE listings ADD COLUMN active INTEGER NOT NULL DEFAULT 1')
+        cursor.execute('DROP INDEX IF EXISTS idx_listings_due')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_listings_due ON listings (active, next_due_at, id)')
+
+    def _add_listing_title(self, cursor):
+        # The scraped title lets the product index match listings again after a restart
+        cursor.execute('ALTER TABLE listings ADD COLUMN last_title TEXT')
+
+    def _update_rollups(self, cursor, observations):
+        """Fold (id, product_id, listing_id, price, timestamp) rows into the rollup tables."""
+        buckets = {}
+        for _, product_id, listing_id, price, timestamp in observations:
+            for granularity in (ROLLUP_HOUR, ROLLUP_DAY, ROLLUP_WEEK):
+                key = (product_id, listing_id, granularity, bucket_start(timestamp, granularity))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [price, price, price, timestamp, 1]
+                    continue
+                bucket[0] = min(bucket[0], price)
+                bucket[1] = max(bucket[1], price)
+                if timestamp >= bucket[3]:
+                    bucket[2], bucket[3] = price, timestamp
+                bucket[4] += 1
+
+        cursor.executemany('''
+            INSERT INTO price_rollups (product_id, listing_id, granularity, bucket_start,
+                                       min_price, max_price, last_price, last_timestamp, count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (product_id, granularity, bucket_start, listing_id) DO UPDATE SET
+                min_price = MIN(min_price, excluded.min_price),
+                max_price = MAX(max_price, excluded.max_price),
+                last_price = CASE WHEN excluded.last_timestamp >= last_timestamp
+                                  THEN excluded.last_price ELSE last_price END,
+                last_timestamp = MAX(last_timestamp, excluded.last_timestamp),
+                count = count + excluded.count
+        ''', [key + tuple(values) for key, values in buckets.items()])
+
+    def _migrate_legacy(self, cursor):
+        """Move rows of the old flat ``scraper_data`` table into the normalized tables."""
+        cursor.execute("SELECT type FROM sqlite_master WHERE name = 'scraper_data'")
+        row = cursor.fetchone()
+        if row is None or row[0] != 'table':
+            return
+
+        cursor.execute('''
+            INSERT OR IGNORE INTO products (name)
+            SELECT DISTINCT COALESCE(name, '') FROM scraper_data
+        ''')
+        cursor.execute('''
+            SELECT DISTINCT COALESCE(d.name, ''), COALESCE(d.url, ''), d.currency FROM scraper_data d
+        ''')
+        for name, url, currency in cursor.fetchall():
+            self._listing_id(cursor, name, url, currency)
+        cursor.execute('''
+            INSERT INTO observations (id, product_id, listing_id, price, timestamp)
+            SELECT d.id, p.id, l.id, d.price, d.timestamp
+            FROM scraper_data d
+            JOIN products p ON p.name = COALESCE(d.name, '')
+            JOIN listings l ON l.product_id = p.id AND l.url = COALESCE(d.url, '')
+            ORDER BY d.id
+        ''')
+        logging.info(f"Migrated {cursor.rowcount} rows from scraper_data to the normalized schema")
+        cursor.execute('DROP TABLE scraper_data')
+
+    def _listing_id(self, cursor, name, url, currency) -> Tuple[int, int]:
+        """Return (product_id, listing_id), creating the rows when needed."""
+        key = (name, url)
+        if key in self._ids:
+            return self._ids[key]
+
+        cursor.execute('INSERT OR IGNORE INTO products (name) VALUES (?)', (name,))
+        cursor.execute('SELECT id FROM products WHERE name = ?', (name,))
+        product_id = cursor.fetchone()[0]
+        cursor.execute('''
+            INSERT OR IGNORE INTO listings (product_id, url, site, currency)
+            VALUES (?, ?, ?, ?)
+        ''', (product_id, url, urlparse(url).hostname, currency))
+        cursor.execute('SELECT id FROM listings WHERE product_id = ? AND url = ?', (product_id, url))
+        listing_id = cursor.fetchone()[0]
+
+        self._ids[key] = (product_id, listing_id)
+        return self._ids[key]
+
+    def _product_id(self, cursor, name) -> Optional[int]:
+        cursor.execute('SELECT id FROM products WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
     def insert_data(self, name, url, currency, price):
-        with self._create_connection() as conn:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('''
-                    INSERT INTO scraper_data (name, url, currency, price)
-                    VALUES (?, ?, ?, ?)
-                ''', (name, url, currency, price))
-                conn.commit()
+        self.insert_many([(name, url, currency, price)])
+
+    def insert_many(self, rows: Iterable[Row]):
+        """Insert a whole batch of rows in a single transaction."""
+        with metrics.span('db_write'), self._lock, closing(self._conn.cursor()) as cursor:
+            try:
+                with self._conn:
+                    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM observations')
+                    last_id = cursor.fetchone()[0]
+                    observations = []
+                    for name, url, currency, price in rows:
+                        product_id, listing_id = self._listing_id(cursor, name, url, currency)
+                        observations.append((product_id, listing_id, price))
+                    cursor.executemany('''
+                        INSERT INTO observations (product_id, listing_id, price)
+                        VALUES (?, ?, ?)
+                    ''', observations)
+
+                    # Keep the rollups in step with the rows just written
+                    cursor.execute('''
+                        SELECT id, product_id, listing_id, price, timestamp
+                        FROM observations WHERE id > ? ORDER BY id
+                    ''', (last_id,))
+                    self._update_rollups(cursor, cursor.fetchall())
+            except Exception:
+                # Ids created in the rolled back transaction are gone
+                self._ids.clear()
+                raise
+
+    def enqueue(self, name, url, currency, price):
+        """Queue a row for the background writer and return immediately."""
+        self._queue.put((name, url, currency, price))
+
+    def enqueue_many(self, rows: Iterable[Row]):
+        for row in rows:
+            self._queue.put(row)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every queued row has been written."""
+        if timeout is None:
+            self._queue.join()
+            return
+        with self._queue.all_tasks_done:
+            self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _write_behind(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is already waiting so it shares the transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    self.insert_many(rows)
+            except Exception as e:
+                # Drop the batch but keep the writer alive, or every later flush() would hang
+                logging.error(f"Write-behind failed for {len(rows)} rows: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if None in batch:
+                return
 
     def fetch_all_data(self):
-        with self._create_connection() as conn:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute('SELECT * FROM scraper_data')
-                return cursor.fetchall()
-            
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT * FROM scraper_data ORDER BY id')
+            return cursor.fetchall()
+
     def fetch_data_by_name(self, name):
-        with self._create_connection() as conn:
-            with closing(conn.cursor()) as cursor:
+        """Return every observation of a product as (id, name, url, currency, price, timestamp)."""
+        return self.fetch_price_range(name)
+
+    def fetch_price_range(self, name, start=None, end=None):
+        """Observations of a product with ``start <= timestamp <= end``, oldest first."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return []
+            cursor.execute('''
+                SELECT o.id, ?, l.url, l.currency, o.price, o.timestamp
+                FROM observations o
+                JOIN listings l ON l.id = o.listing_id
+                WHERE o.product_id = ? AND o.timestamp >= ? AND o.timestamp <= ?
+                ORDER BY o.timestamp ASC, o.id ASC
+            ''', (name, product_id, _format_time(start, MIN_TIMESTAMP), _format_time(end, MAX_TIMESTAMP)))
+            return cursor.fetchall()
+
+    def fetch_rollups(self, name, granularity, start=None, end=None):
+        """Per-bucket history of a product across its listings.
+
+        Returns (bucket_start, min_price, max_price, last_price, count) rows,
+        oldest first. ``last_price`` is the most recent price in the bucket on
+        any listing.
+        """
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return []
+            first_bucket = _format_time(start, MIN_TIMESTAMP)
+            if start is not None:
+                try:
+                    first_bucket = bucket_start(first_bucket, granularity)
+                except ValueError:
+                    pass
+            cursor.execute('''
+                SELECT bucket_start, min_price, max_price, last_price, last_timestamp, count
+                FROM price_rollups
+                WHERE product_id = ? AND granularity = ? AND bucket_start >= ? AND bucket_start <= ?
+                ORDER BY bucket_start ASC, last_timestamp ASC
+            ''', (product_id, granularity, first_bucket, _format_time(end, MAX_TIMESTAMP)))
+            rows = cursor.fetchall()
+
+        # Merge the listings of each bucket; rows are sorted so the last one wins
+        merged = {}
+        for bucket, low, high, last, _, count in rows:
+            if bucket in merged:
+                previous = merged[bucket]
+                merged[bucket] = (bucket, min(previous[1], low), max(previous[2], high), last, previous[4] + count)
+            else:
+                merged[bucket] = (bucket, low, high, last, count)
+        return list(merged.values())
+
+    def fetch_history(self, name, start=None, end=None):
+        """History of a product at a resolution that fits the requested span.
+
+        Picks raw observations for short spans and the hourly, daily or weekly
+        rollup for longer ones, so the number of rows stays bounded however
+        long the span is. Returns (granularity, rows) with rows shaped like
+        ``fetch_rollups``.
+        """
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return None, []
+            cursor.execute('''
+                SELECT MIN(timestamp), MAX(timestamp) FROM observations
+                WHERE product_id = ? AND timestamp >= ? AND timestamp <= ?
+            ''', (product_id, _format_time(start, MIN_TIMESTAMP), _format_time(end, MAX_TIMESTAMP)))
+            first, last = cursor.fetchone()
+        if first is None:
+            return None, []
+
+        span = datetime.strptime(last, TIMESTAMP_FORMAT) - datetime.strptime(first, TIMESTAMP_FORMAT)
+        granularity = choose_granularity(span)
+        if granularity is None:
+            rows = self.fetch_price_range(name, start, end)
+            return None, [(row[5], row[4], row[4], row[4], 1) for row in rows]
+        return granularity, self.fetch_rollups(name, granularity, first, end)
+
+    def count_observations(self, since=None) -> int:
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT COUNT(*) FROM observations WHERE timestamp >= ?',
+                           (_format_time(since, MIN_TIMESTAMP),))
+            return cursor.fetchone()[0]
+
+    def iter_observation_columns(self, since=None, batch_size: int = 10000):
+        """Yield (product_id, unix_time, price) for every observation.
+
+        Rows are ordered by product and time and streamed in batches, so callers
+        can fill arrays without materializing the whole table as Python tuples.
+        """
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT product_id, CAST(strftime('%s', timestamp) AS INTEGER), price
+                FROM observations
+                WHERE timestamp >= ?
+                ORDER BY product_id, timestamp, id
+            ''', (_format_time(since, MIN_TIMESTAMP),))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+
+    def iter_new_observations(self, after_id: int = 0, batch_size: int = 50000):
+        """Yield batches of (id, product_id, listing_id, unix_time, price) rows with ``id > after_id``, in id order.
+
+        Each batch is a separate query, so writers are not held up between batches.
+        """
+        while True:
+            with self._lock, closing(self._conn.cursor()) as cursor:
                 cursor.execute('''
-                               SELECT * FROM scraper_data 
-                               WHERE name = ?
-                               ORDER BY timestamp ASC
-                               ''', (name,))
-                return cursor.fetchall()
+                    SELECT id, product_id, listing_id, CAST(strftime('%s', timestamp) AS INTEGER), price
+                    FROM observations
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (after_id, batch_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            after_id = rows[-1][0]
+            yield rows
+
+    def set_in_stock(self, name, in_stock: bool) -> Optional[bool]:
+        """Record whether a product is currently available; returns the previous state."""
+        with self._lock, self._conn, closing(self._conn.cursor()) as cursor:
+            cursor.execute('INSERT OR IGNORE INTO products (name) VALUES (?)', (name,))
+            cursor.execute('SELECT in_stock FROM products WHERE name = ?', (name,))
+            previous = cursor.fetchone()[0]
+            cursor.execute('UPDATE products SET in_stock = ? WHERE name = ?', (int(in_stock), name))
+        return None if previous is None else bool(previous)
+
+    def fetch_last_alert(self, name) -> Optional[str]:
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT last_alert_at FROM products WHERE name = ?', (name,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def mark_alerted(self, name):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE products SET last_alert_at = CURRENT_TIMESTAMP WHERE name = ?', (name,))
+
+    def add_to_outbox(self, chat_id, caption, photo_path=None) -> int:
+        """Persist an outgoing Telegram message until it is delivered."""
+        with self._lock, self._conn, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                INSERT INTO outbox (chat_id, caption, photo_path) VALUES (?, ?, ?)
+            ''', (str(chat_id), caption, photo_path))
+            return cursor.lastrowid
+
+    def fetch_due_outbox(self, now: float, limit: int = 100):
+        """Pending messages whose next attempt is due, oldest first.
+
+        Returns (id, chat_id, caption, photo_path, attempts) rows.
+        """
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT id, chat_id, caption, photo_path, attempts FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id
+                LIMIT ?
+            ''', (now, limit))
+            return cursor.fetchall()
+
+    def mark_outbox_sent(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE outbox SET status = 'sent' WHERE id = ?", [(i,) for i in ids])
+
+    def mark_outbox_retry(self, ids, error: str, next_attempt_at: float, max_attempts: int):
+        """Schedule another attempt, or give up once ``max_attempts`` is reached."""
+        with self._lock, self._conn:
+            self._conn.executemany('''
+                UPDATE outbox SET
+                    attempts = attempts + 1,
+                    last_error = ?,
+                    next_attempt_at = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                WHERE id = ?
+            ''', [(error, next_attempt_at, max_attempts, i) for i in ids])
+
+    def fetch_catalog_generation(self) -> int:
+        """Number of the last catalog import (0 before the first one)."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT COALESCE(MAX(catalog_generation), 0) FROM products')
+            return cursor.fetchone()[0]
+
+    def import_catalog(self, entries: List[CatalogEntry], generation: int) -> Tuple[int, int]:
+        """Upsert a chunk of catalog entries in one transaction.
+
+        Entries whose hash matches the stored one are only stamped with
+        ``generation``; the others get their listings replaced by the given
+        URLs. Returns (changed, unchanged).
+        """
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            placeholders = ','.join('?' * len(entries))
+            # A deactivated product needs its listings back even when unchanged
+            cursor.execute(f'SELECT name, catalog_hash FROM products WHERE active = 1 AND name IN ({placeholders})',
+                           [name for name, _, _ in entries])
+            stored = dict(cursor.fetchall())
+            unchanged = [name for name, digest, _ in entries if stored.get(name) == digest]
+            changed = [entry for entry in entries if stored.get(entry[0]) != entry[1]]
+            try:
+                with self._conn:
+                    cursor.executemany('UPDATE products SET catalog_generation = ?, active = 1 WHERE name = ?',
+                                       [(generation, name) for name in unchanged])
+                    cursor.executemany('INSERT OR IGNORE INTO products (name) VALUES (?)',
+                                       [(name,) for name, _, _ in changed])
+                    cursor.executemany('''
+                        UPDATE products SET catalog_hash = ?, catalog_generation = ?, active = 1 WHERE name = ?
+                    ''', [(digest, generation, name) for name, digest, _ in changed])
+                    # Listings dropped from an entry stop being scheduled
+                    cursor.executemany('''
+                        UPDATE listings SET active = 0 WHERE product_id = (SELECT id FROM products WHERE name = ?)
+                    ''', [(name,) for name, _, _ in changed])
+                    cursor.executemany('''
+                        INSERT INTO listings (product_id, url, site, currency)
+                        VALUES ((SELECT id FROM products WHERE name = ?), ?, ?, ?)
+                        ON CONFLICT (product_id, url) DO UPDATE SET active = 1, currency = excluded.currency
+                    ''', [(name, url, urlparse(url).hostname, currency)
+                          for name, _, listings in changed for url, currency in listings])
+            except sqlite3.Error:
+                self._ids.clear()
+                raise
+        return len(changed), len(unchanged)
+
+    def deactivate_catalog(self, generation: int) -> int:
+        """Stop scheduling the products that were not part of catalog import ``generation``."""
+        with self._lock, self._conn, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                UPDATE products SET active = 0
+                WHERE active = 1 AND (catalog_generation IS NULL OR catalog_generation < ?)
+            ''', (generation,))
+            removed = cursor.rowcount
+            cursor.execute('''
+                UPDATE listings SET active = 0
+                WHERE active = 1 AND product_id IN (SELECT id FROM products WHERE active = 0)
+            ''')
+        return removed
+
+    def fetch_due_listings(self, now: float, limit: int = 100, after: Optional[Tuple[float, int]] = None):
+        """Active listings whose next check is due, most overdue first.
+
+        Returns (name, url, check_interval, last_price, last_checked_at,
+        failures, next_due_at, listing_id) rows. Pass the last two values of
+        the previous page as ``after`` to read the next page.
+        """
+        due_at, listing_id = after or (float('-inf'), 0)
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT p.name, l.url, l.check_interval, l.last_price, l.last_checked_at, l.failures,
+                       l.next_due_at, l.id
+                FROM listings l JOIN products p ON p.id = l.product_id
+                WHERE l.active = 1 AND l.next_due_at <= ? AND (l.next_due_at, l.id) > (?, ?)
+                ORDER BY l.next_due_at, l.id
+                LIMIT ?
+            ''', (now, due_at, listing_id, limit))
+            return cursor.fetchall()
+
+    def fetch_listing_offers(self):
+        """(name, url, currency, last_price, last_checked_at, last_title) of every active listing, by product."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT p.name, l.url, l.currency, l.last_price, l.last_checked_at, l.last_title
+                FROM listings l JOIN products p ON p.id = l.product_id
+                WHERE l.active = 1
+                ORDER BY p.id, l.id
+            ''')
+            return cursor.fetchall()
+
+    def fetch_listing_schedule(self, name, url):
+        """(check_interval, last_price, last_checked_at, failures) of a listing, or None."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT l.check_interval, l.last_price, l.last_checked_at, l.failures
+                FROM listings l JOIN products p ON p.id = l.product_id
+                WHERE p.name = ? AND l.url = ?
+            ''', (name, url))
+            return cursor.fetchone()
+
+    def update_listing_schedule(self, updates):
+        """Store (next_due_at, check_interval, last_price, last_checked_at, failures, title, name, url) rows.
+
+        A None title (failed check) keeps the listing's last one.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany('''
+                UPDATE listings SET
+                    next_due_at = ?, check_interval = ?, last_price = ?, last_checked_at = ?, failures = ?,
+                    last_title = COALESCE(?, last_title)
+                WHERE url = ? AND product_id = (SELECT id FROM products WHERE name = ?)
+            ''', [(due, interval, price, checked, failures, title, url, name)
+                  for due, interval, price, checked, failures, title, name, url in updates])
+
+    def fetch_product_names(self):
+        """Map product ids to names."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT id, name FROM products')
+            return dict(cursor.fetchall())
+
+    def fetch_last_observation_id(self, name) -> Optional[int]:
+        """Id of the newest observation of a product; changes whenever its history does."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return None
+            cursor.execute('SELECT MAX(id) FROM observations WHERE product_id = ?', (product_id,))
+            return cursor.fetchone()[0]
+
+    def fetch_latest_price(self, name):
+        """Most recent observation of a product as (price, currency, url, timestamp), or None."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return None
+            cursor.execute('''
+                SELECT o.price, l.currency, l.url, o.timestamp
+                FROM observations o
+                JOIN listings l ON l.id = o.listing_id
+                WHERE o.product_id = ?
+                ORDER BY o.timestamp DESC, o.id DESC
+                LIMIT 1
+            ''', (product_id,))
+            return cursor.fetchone()
+
+    def fetch_min_price(self, name, start=None, end=None):
+        """Lowest observation of a product in the window as (price, currency, url, timestamp), or None."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            product_id = self._product_id(cursor, name)
+            if product_id is None:
+                return None
+            cursor.execute('''
+                SELECT o.price, l.currency, l.url, o.timestamp
+                FROM observations o
+                JOIN listings l ON l.id = o.listing_id
+                WHERE o.product_id = ? AND o.timestamp >= ? AND o.timestamp <= ?
+                ORDER BY o.price ASC, o.timestamp DESC
+                LIMIT 1
+            ''', (product_id, _format_time(start, MIN_TIMESTAMP), _format_time(end, MAX_TIMESTAMP)))
+            return cursor.fetchone()
+
+    def close(self):
+        """Write pending rows and close the connection."""
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+
+_handlers = {}
+_handlers_lock = threading.Lock()
 
+def get_database(db_name='scraper_data.db') -> DatabaseHandler:
+    """Return the shared handler for ``db_name``, creating it on first use."""
+    with _handlers_lock:
+        if db_name not in _handlers:
+            _handlers[db_name] = DatabaseHandler(db_name)
+        return _handlers[db_name]
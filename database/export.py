@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+import argparse
+import numpy as np
+from typing import Dict, Optional
+
+from config_loader import load_config
+from database.database import DatabaseHandler, get_database
+
+
+# Load configuration from YAML file
+config = load_config()
+
+# Every partition stores one raw little-endian file per column, so readers can
+# memory-map only the columns they need (see analysis.history_reader)
+COLUMNS = {
+    'id': np.dtype('<i8'),
+    'listing_id': np.dtype('<i8'),
+    'time': np.dtype('<i8'),     # unix seconds, UTC
+    'price': np.dtype('<f8'),
+}
+
+EXPORT_DTYPE = np.dtype([
+    ('id', '<i8'), ('product_id', '<i8'), ('listing_id', '<i8'), ('time', '<i8'), ('price', '<f8'),
+])
+
+MANIFEST = 'manifest.json'
+
+
+def partition_path(root: str, product_id: int, month: str) -> str:
+    return os.path.join(root, f'product={product_id}', f'month={month}')
+
+
+def column_path(root: str, product_id: int, month: str, column: str) -> str:
+    return os.path.join(partition_path(root, product_id, month), f'{column}.bin')
+
+
+def read_manifest(root: str) -> Dict:
+    """Committed state of an export: ``{'last_id': .., 'partitions': {product_id: {month: rows}}}``.
+
+    Readers only trust the row counts listed here; bytes past them belong to
+    an export that has not committed yet.
+    """
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'last_id': 0, 'partitions': {}}
+
+
+class HistoryExporter:
+    """Append new observations to column files partitioned by product and month.
+
+    Each run exports the observations added since the last one, streamed from
+    SQLite in batches of ``batch_size`` rows, and commits a batch by rewriting
+    the manifest atomically. A run interrupted half way is harmless: the next
+    one truncates the column files back to the committed row counts first.
+    """
+
+    def __init__(self, root: str, db: Optional[DatabaseHandler] = None, batch_size: int = 50000):
+        self.root = root
+        self.db = db or get_database()
+        self.batch_size = batch_size
+
+    def _write_manifest(self, manifest: Dict):
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+    def _truncate(self, manifest: Dict):
+        """Drop rows written after the last commit."""
+        for product_id, months in manifest['partitions'].items():
+            for month, rows in months.items():
+                for column, dtype in COLUMNS.items():
+                    path = column_path(self.root, product_id, month, column)
+                    if os.path.getsize(path) > rows * dtype.itemsize:
+                        os.truncate(path, rows * dtype.itemsize)
+
+    def _append(self, manifest: Dict, product_id: int, month: str, rows: np.ndarray):
+        months = manifest['partitions'].setdefault(str(product_id), {})
+        # A partition missing from the manifest may hold uncommitted rows; start it over
+        mode = 'ab' if month in months else 'wb'
+        os.makedirs(partition_path(self.root, product_id, month), exist_ok=True)
+        for column, dtype in COLUMNS.items():
+            with open(column_path(self.root, product_id, month, column), mode) as f:
+                f.write(rows[column].astype(dtype).tobytes())
+        months[month] = months.get(month, 0) + len(rows)
+
+    def export(self) -> int:
+        """Export the new observations; returns how many were written."""
+        os.makedirs(self.root, exist_ok=True)
+        manifest = read_manifest(self.root)
+        self._truncate(manifest)
+
+        exported = 0
+        for rows in self.db.iter_new_observations(manifest['last_id'], self.batch_size):
+            batch = np.array(rows, dtype=EXPORT_DTYPE)
+            months = batch['time'].astype('datetime64[s]').astype('datetime64[M]')
+            # Group by product and month, keeping id (= insertion time) order inside each group
+            order = np.lexsort((batch['id'], months, batch['product_id']))
+            batch, months = batch[order], months[order]
+            product_ids = batch['product_id']
+            starts = np.flatnonzero(np.r_[True, (product_ids[1:] != product_ids[:-1]) | (months[1:] != months[:-1])])
+            for start, end in zip(starts, np.r_[starts[1:], len(batch)]):
+                self._append(manifest, int(product_ids[start]), str(months[start]), batch[start:end])
+
+            manifest['last_id'] = int(batch['id'].max())
+            self._write_manifest(manifest)
+            exported += len(batch)
+
+        if exported:
+            logging.info(f"Exported {exported} observations to {self.root}")
+        return exported
+
+
+def get_history_exporter(db: Optional[DatabaseHandler] = None) -> HistoryExporter:
+    """Build the exporter from the ``export`` section of the config."""
+    options = config.get('export') or {}
+    return HistoryExporter(options.get('path', 'data/history'), db=db, batch_size=options.get('batch_size', 50000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export new price observations to columnar files")
+    parser.add_argument('--path', help="export directory (default: export.path)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(message)s")
+    exporter = get_history_exporter()
+    if args.path:
+        exporter.root = args.path
+    print(f"{exporter.export()} observations exported to {exporter.root}")
+    exporter.db.close()
+
+
+if __name__ == '__main__':
+    main()
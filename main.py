@@ -2,16 +2,26 @@
 
 import sys
 import asyncio
+import argparse
 import logging
 from datetime import datetime
 import time
+from concurrent.futures import as_completed
 #from apscheduler.schedulers.blocking import BlockingScheduler  # Uncomment this line
 from apscheduler.schedulers.background import BackgroundScheduler
 from config_loader import load_config
-from scrapers import scraper as Scraper
-from database.database import DatabaseHandler  # Import the database handler
-from analysis.visualizer import plot_price_history
-from bot.telegram_bot import send_alert
+from scrapers.engine import ScrapeEngine
+from scrapers.browser import close_browsers
+from database.database import get_database  # Import the database handler
+from analysis.render_service import get_render_service, shutdown_render_service
+from bot.telegram_bot import queue_alert, deliver_pending
+from bot.delivery import get_delivery_queue
+from scheduler.event_loop import get_event_loop, run_async
+from scheduler.job_scheduler import get_listing_scheduler
+from catalog.catalog import get_catalog
+from catalog.product_index import get_product_index
+from monitoring import metrics
+from monitoring.profiling import profile_cycle
 
 if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -27,63 +37,159 @@ logging.basicConfig(
 )
 
 # Initialize the database handler
-db_handler = DatabaseHandler()
+db_handler = get_database()
+
+# Initialize the concurrent scraping engine ("threads", "async" or "distributed").
+# Only the selected engine's module (and its dependencies) is imported.
+if config['scraping'].get('engine', 'threads') == 'async':
+    from scrapers.async_engine import AsyncScrapeEngine
+    engine = AsyncScrapeEngine()
+elif config['scraping'].get('engine') == 'distributed':
+    # URLs are only enqueued here; scrapers.worker processes scrape them
+    from scrapers.distributed_engine import DistributedScrapeEngine
+    engine = DistributedScrapeEngine()
+else:
+    engine = ScrapeEngine()
+is_async_engine = config['scraping'].get('engine') == 'async'
+
+# Watch list in the DB, re-imported when its source files change
+catalog = get_catalog(db_handler)
+
+# Canonical products and their best current offer across listings and sites
+product_index = get_product_index(db_handler)
+
+# Per-listing check schedule (next due time and adaptive interval in the DB)
+listing_scheduler = get_listing_scheduler(db_handler)
+
+# Alert rules engine, created by the first cycle that has results to analyze
+alert_engine = None
+
+# Set by --profile to (output path, tool): the next cycle runs under the profiler
+profile_request = None
 
 def job():
     """Job to be run by the scheduler."""
+    global profile_request
+    request, profile_request = profile_request, None
+    with metrics.span('cycle'):
+        if request:
+            with profile_cycle(*request):
+                run_cycle()
+        else:
+            run_cycle()
+
+def run_cycle():
+    """Scrape the due listings, store the prices and send the alerts."""
     logging.info("Scheduler job started.")
     
     try:
+        # New, changed or removed catalog entries apply from this cycle on
+        if catalog.refresh():
+            product_index.load(db_handler.fetch_listing_offers())
+
+        updated = []        # products with a new observation this cycle
+        stock_changes = {}  # products whose availability changed
+        candidates = {}     # results of the products above, by name, for the alert messages
+        checked = 0
+        # Only the listings that are due, streamed from the DB in chunks;
+        # unfinished ones stay due after a crash
+        for products in listing_scheduler.iter_due_products():
+            # Scrape all due URLs concurrently
+            with metrics.span('scrape'):
+                if is_async_engine:
+                    results = run_async(engine.run(products))
+                else:
+                    results = engine.run(products)
+
+            for result in results:
+                product = result['product']
+                listings = result.get('listings') or {}
+                for url, listing in listings.items():
+                    product_index.update(product['name'], url, listing)
+                # The product's price is its best offer over all of its listings,
+                # including those not due this cycle, so scraping only some of its
+                # URLs cannot pass for a price change
+                best = product_index.best_offer(product['name'])
+                in_stock = best is not None
+                scraped = [listing for listing in listings.values() if listing and listing['success']]
+                if scraped:
+                    logging.info(f"Scraped {product['name']}: " + (
+                        f"best offer {best.currency} {best.price} at {best.url}" if best else "out of stock"))
+                    logging.debug(f"Scraped listings: {listings}")
+
+                    # Queue data for the database writer (adjust mapping as needed)
+                    if all(listing.get('unchanged') for listing in scraped):
+                        logging.info(f"Price unchanged since last scrape, skipping DB write for {product['name']}")
+                    elif in_stock:
+                        db_handler.enqueue(
+                            name=product.get('name', ''),
+                            url=best.url,
+                            currency=best.currency,
+                            price=best.price
+                        )
+                        updated.append(product['name'])
+                        candidates[product['name']] = result
+                else:
+                    logging.error(f"Failed to scrape product data for {product['name']}")
+
+                previous_stock = db_handler.set_in_stock(product['name'], in_stock)
+                if previous_stock is not None and previous_stock != in_stock:
+                    stock_changes[product['name']] = {'previous': previous_stock, 'current': in_stock}
+                    candidates[product['name']] = result
+
+            # Rules and charts read the history, so the chunk's rows must be on disk first
+            db_handler.flush()
 
-        products = config['products']
-        if not products:
-            logging.error("No products found in the configuration.")
+            # Checkpoint: the scraped listings move on to their next due time
+            listing_scheduler.record(results)
+            checked += len(results)
+
+        if not checked:
+            logging.info("No listings due.")
             return
-        
-        for product in products:
-            if not product.get('urls'):
-                logging.error(f"No URLs found for product: {product['name']}")
+
+        # numpy and the rules are only imported once there is something to analyze
+        from analysis.analytics import analyze_cycle, load_history
+        from analysis.alert_rules import AlertEngine
+        global alert_engine
+        if alert_engine is None:
+            alert_engine = AlertEngine(config.get('alerts'), (config.get('analysis') or {}).get('window_days', 30))
+
+        # Batched statistics (lows, volatility, z-score drops) for all products
+        history = load_history(db_handler)
+        analyze_cycle(db_handler, history)
+
+        # Only products that triggered an alert rule get a chart and a message
+        triggered = alert_engine.evaluate(db_handler, updated, stock_changes, history)
+        logging.info(f"{len(triggered)} of {checked} products triggered alerts")
+
+        # Charts render in worker processes; alerts go out as each one is ready.
+        # The render pool is only started the first time an alert needs a chart.
+        render_service = get_render_service() if triggered else None
+        renders = {render_service.render(name): candidates[name] for name in triggered}
+
+        for future in as_completed(renders):
+            product = renders[future]['product']
+            try:
+                image_path = future.result()
+            except Exception as e:
+                logging.error(f"Chart rendering failed for {product['name']}: {e}")
                 continue
-            logging.info(f"Scrapping product: {product['name']}")
-            
-            product_data = dict() # Initialize product data dictionary
-            # Scrape each URL for the first product
-            for url in product['urls']:
-
-                # Get the appropriate scraper for the URL
-                scraper = Scraper.get_scraper(url)
-                if not scraper:
-                    logging.error(f"No scraper available for URL: {url}")
-                    continue
-                
-                # Scrape the product data
-                logging.info(f"Scraping URL: {url}")
-                product_data = Scraper.compare_prices(product_data, scraper.scrape_product(url)) 
-            if product_data and product_data['success']:
-                logging.info(f"Scraped product data: {product_data}")
-
-                # Save data to the database (adjust mapping as needed)
-                db_handler.insert_data(
-                    name=product.get('name', ''),
-                    url=product_data.get('url', ''),
-                    currency=product_data.get('currency', ''),
-                    price=product_data.get('price', 0)
-                )
-            else:
-                logging.error(f"Failed to scrape product data for {product['name']}")
-
-            # Generate graph image and get the file path
-            image_path = plot_price_history(product['name'], save_to_file=True)
 
             # Compose a message with product info
+            best = product_index.best_offer(product['name'])
             message = (
                 f"Product: {product.get('name', '')}\n"
-                f"Price: {product_data.get('currency', '')} {product_data.get('price', 0)}\n"
-                f"URL: {product_data.get('url', '')}"
+                + (f"Price: {best.currency} {best.price}\nURL: {best.url}\n" if best else "Out of stock\n")
+                + "\n".join(triggered[product['name']])
             )
             
-            # Send Telegram alert with the graph image
-            send_alert(message, image_path)
+            # Queue the Telegram alert; it is persisted until delivered
+            queue_alert(message, image_path)
+            db_handler.mark_alerted(product['name'])
+
+        # One batched delivery for the whole cycle (media groups / digest)
+        deliver_pending()
         
     except Exception as e:
         logging.error(f"Job error: {e}")
@@ -91,10 +197,33 @@ def job():
 
 def main():
     """Main entry point to start the scheduler."""
+    global profile_request
+    parser = argparse.ArgumentParser(description="Price scanner scheduler")
+    parser.add_argument('--profile', metavar='PATH', help="profile the first cycle and save the report to PATH")
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'], default='cprofile',
+                        help="cprofile also profiles the scrape worker threads; pyinstrument only the scheduler thread")
+    args = parser.parse_args()
+    if args.profile:
+        profile_request = (args.profile, args.profiler)
+
+    # Prometheus-style /metrics endpoint
+    monitoring = config.get('monitoring') or {}
+    if monitoring.get('metrics_port'):
+        metrics.start_metrics_server(monitoring.get('metrics_host', '127.0.0.1'), monitoring['metrics_port'])
+
     scheduler = BackgroundScheduler()
 
-    # 'cron' for defining the job schedule every day at 9:00 AM
-    scheduler.add_job(job, 'cron', hour=9, minute=0, next_run_time=datetime.now())
+    # Check for due listings every few minutes; each listing has its own interval
+    scheduler.add_job(job, 'interval', seconds=(config.get('schedule') or {}).get('tick', 300),
+                      next_run_time=datetime.now(), max_instances=1, coalesce=True)
+    # Incremental columnar export of the price history for offline analysis
+    if (config.get('export') or {}).get('interval'):
+        from database.export import get_history_exporter
+        scheduler.add_job(get_history_exporter(db_handler).export, 'interval', seconds=config['export']['interval'],
+                          max_instances=1, coalesce=True)
+    # Retry alerts left in the outbox by failed deliveries or a restart
+    scheduler.add_job(deliver_pending, 'interval', seconds=config['telegram'].get('retry_interval', 60),
+                      next_run_time=datetime.now())
     scheduler.start()
     logging.info("Scheduler started. Press Ctrl+C to exit.")
     print("Scheduler started. Press Ctrl+C to exit.")
@@ -107,6 +236,13 @@ def main():
         # Handle shutdown gracefully
         logging.info("Shutdown requested. Shutting down scheduler...")
         scheduler.shutdown(wait=False)
+        close_browsers()
+        if is_async_engine:
+            run_async(engine.close())
+        run_async(get_delivery_queue().close())
+        get_event_loop().stop()
+        shutdown_render_service()
+        db_handler.close()
         logging.info("Scheduler terminated.")
         sys.exit(0)
 
@@ -0,0 +1,155 @@
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = 'price_scanner_'
+
+# Help text of the metrics the code records
+HELP = {
+    'stage_seconds': 'Time spent in each stage of a scrape cycle',
+    'scrapes_total': 'Scraped URLs by site and outcome',
+    'retries_total': 'Scrape attempts beyond the first',
+    'fallbacks_total': 'URLs the plain-HTTP tier could not serve, sent to the browser',
+    'cache_total': 'Page cache lookups by result',
+    'chart_cache_total': 'Chart renders served from the image cache (hit) or drawn (miss)',
+    'telegram_messages_total': 'Telegram messages by outcome',
+    'rate_limit_rps': 'Current request rate allowed by the adaptive per-site limiter',
+    'circuit_open': '1 while the site is paused by its circuit breaker',
+    'browser_bytes_total': 'Bytes the browser tier downloaded (encoded, as on the wire)',
+    'browser_blocked_requests_total': 'Requests a lean browser blocked (images, fonts, media, trackers)',
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms rendered in Prometheus text format.
+
+    Recording is a dict update under a lock, cheap enough for the per-page
+    hot path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[bisect.bisect_left(BUCKETS, value)] += 1
+            histogram[-1] += value
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        lines = []
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            for name in sorted({name for name, _ in series}):
+                lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for (series_name, labels), value in sorted(series.items()):
+                    if series_name == name:
+                        lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for (series_name, labels), histogram in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float('inf'),), histogram[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram[-1]:.6f}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by the helpers below
+METRICS = Metrics()
+
+
+def inc(name: str, amount: float = 1, **labels):
+    METRICS.inc(name, amount, **labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    METRICS.set_gauge(name, value, **labels)
+
+
+def observe(stage: str, seconds: float, site: Optional[str] = None):
+    """Record the duration of one stage (see ``span``)."""
+    METRICS.observe('stage_seconds', seconds, stage=stage, site=site)
+
+
+@contextmanager
+def span(stage: str, site: Optional[str] = None):
+    """Time the ``with`` block into the ``stage_seconds`` histogram, even when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started, site)
+
+
+def start_metrics_server(host: str = '127.0.0.1', port: int = 9108) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` in Prometheus text format from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = METRICS.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logging.info(f"Metrics endpoint listening on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,78 @@
+import io
+import sys
+import pstats
+import threading
+import logging
+import cProfile
+from contextlib import contextmanager
+from typing import Optional
+
+
+@contextmanager
+def profile_cycle(output_path: str, tool: str = 'cprofile', top: int = 30):
+    """Profile the ``with`` block and save the report to ``output_path``.
+
+    ``tool`` is ``cprofile`` (writes a pstats file, readable with
+    ``python -m pstats`` or snakeviz) or ``pyinstrument`` (writes an HTML
+    report; pyinstrument is an optional dependency). The ``top`` functions by
+    cumulative time are also logged.
+
+    cProfile also covers the threads started inside the block, such as the
+    scrape pool's workers, and merges them into one report. Threads that
+    were already running (the async engine's event loop thread) are only
+    covered on Python 3.12+. pyinstrument only sees the calling thread.
+    """
+    profiler = None
+    if tool == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+        except ImportError:
+            logging.warning("pyinstrument is not installed, falling back to cProfile")
+            tool = 'cprofile'
+
+    if tool == 'pyinstrument':
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(output_path, 'w') as f:
+                f.write(profiler.output_html())
+            logging.info(f"Cycle profile written to {output_path}")
+        return
+
+    profiler = cProfile.Profile()
+    thread_profilers = []
+    # Before 3.12 a cProfile profiler only sees the thread that enabled it, so
+    # every new thread starts its own; from 3.12 on one profiler sees them all
+    per_thread = sys.version_info < (3, 12)
+
+    def start_thread_profiler(frame, event, arg):
+        thread_profiler = cProfile.Profile()
+        thread_profilers.append(thread_profiler)
+        # Replaces this hook as the thread's profile function
+        thread_profiler.enable()
+
+    if per_thread:
+        threading.setprofile(start_thread_profiler)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        stats.dump_stats(output_path)
+        logging.info(f"Cycle profile written to {output_path} ({len(thread_profilers)} threads merged):\n"
+                     f"{_summary(stats, top)}")
+
+
+def _summary(stats: pstats.Stats, top: Optional[int]) -> str:
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(top)
+    return stream.getvalue()
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class EventLoopThread:
+    """A single long-lived asyncio event loop running in a daemon thread.
+
+    Synchronous code (the APScheduler jobs) submits coroutines with ``run()``
+    instead of creating and tearing down an event loop for every call, so
+    connection pools and clients created on the loop survive between jobs.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name='event-loop', daemon=True)
+        self._thread.start()
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the shared loop and block until it finishes."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("EventLoopThread.run() called from the event loop thread")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout)
+
+    def stop(self):
+        """Cancel pending tasks and stop the loop."""
+        if not self.loop.is_running():
+            return
+
+        async def _shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(5)
+        except Exception as e:
+            logging.warning(f"Event loop shutdown did not complete cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+
+
+_event_loop: Optional[EventLoopThread] = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> EventLoopThread:
+    """Return the process-wide event loop thread, starting it on first use."""
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = EventLoopThread()
+        return _event_loop
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run ``coro`` on the process-wide event loop and return its result."""
+    return get_event_loop().run(coro, timeout)
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import closing, contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from config_loader import load_config
+
+
+# Load configuration from YAML file
+config = load_config()
+
+# Job states
+STATUS_QUEUED = 'queued'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobQueue:
+    """Durable job queue in a SQLite file shared by a coordinator and its workers.
+
+    ``enqueue`` deduplicates on a key: while a job with the same key is queued,
+    leased, or finished less than ``dedup_window`` seconds ago, its id is
+    returned instead of adding a new one, so a restarted coordinator picks up
+    the jobs (and results) of the interrupted cycle.
+
+    Workers ``lease`` jobs for ``visibility_timeout`` seconds. A job whose
+    lease runs out, because its worker crashed or hung, becomes available to
+    other workers again; ``heartbeat`` extends a lease for long jobs. Failed
+    attempts are retried with a growing delay up to ``max_attempts``. Only the
+    current lease holder may complete or fail a job.
+    """
+
+    def __init__(self, path: str = 'job_queue.db', visibility_timeout: float = 300,
+                 max_attempts: int = 3, retry_delay: float = 30, dedup_window: float = 3600):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.dedup_window = dedup_window
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY,
+                    dedup_key TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (dedup_key, status)')
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+    def enqueue(self, payload: Dict, dedup_key: Optional[str] = None, delay: float = 0) -> int:
+        """Add a job and return its id, or the id of the live job with the same key."""
+        now = time.time()
+        with self._transaction() as cursor:
+            if dedup_key is not None:
+                cursor.execute('''
+                    SELECT id FROM jobs
+                    WHERE dedup_key = ?
+                      AND (status IN ('queued', 'leased') OR (status = 'done' AND finished_at >= ?))
+                    ORDER BY id DESC LIMIT 1
+                ''', (dedup_key, now - self.dedup_window))
+                row = cursor.fetchone()
+                if row:
+                    return row[0]
+            cursor.execute('''
+                INSERT INTO jobs (dedup_key, payload, max_attempts, available_at, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (dedup_key, json.dumps(payload), self.max_attempts, now + delay, now))
+            return cursor.lastrowid
+
+    def enqueue_many(self, jobs: Iterable[Dict], key: str = 'url') -> List[int]:
+        """Enqueue payloads deduplicated on ``payload[key]``."""
+        return [self.enqueue(payload, payload.get(key)) for payload in jobs]
+
+    def lease(self, worker_id: str, limit: int = 1, visibility_timeout: Optional[float] = None) -> List[Dict]:
+        """Lease up to ``limit`` ready jobs, including jobs whose previous lease expired."""
+        now = time.time()
+        expires = now + (visibility_timeout or self.visibility_timeout)
+        with self._transaction() as cursor:
+            # Expired leases that used up their attempts will never succeed
+            cursor.execute('''
+                UPDATE jobs SET status = 'failed', error = 'lease expired', finished_at = ?, lease_owner = NULL
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts
+            ''', (now, now))
+            cursor.execute('''
+                SELECT id, payload, attempts FROM jobs
+                WHERE (status = 'queued' AND available_at <= ?)
+                   OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY available_at, id
+                LIMIT ?
+            ''', (now, now, limit))
+            rows = cursor.fetchall()
+            cursor.executemany('''
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE id = ?
+            ''', [(worker_id, expires, row[0]) for row in rows])
+        return [{'id': row[0], 'payload': json.loads(row[1]), 'attempt': row[2] + 1} for row in rows]
+
+    def heartbeat(self, job_ids: Iterable[int], worker_id: str, visibility_timeout: Optional[float] = None) -> int:
+        """Extend the leases ``worker_id`` still holds; returns how many were extended."""
+        expires = time.time() + (visibility_timeout or self.visibility_timeout)
+        with self._transaction() as cursor:
+            cursor.executemany('''
+                UPDATE jobs SET lease_expires = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            ''', [(expires, job_id, worker_id) for job_id in job_ids])
+            return cursor.rowcount
+
+    def complete(self, job_id: int, worker_id: str, result) -> bool:
+        """Store the result of a job; False if the lease was lost to another worker."""
+        with self._transaction() as cursor:
+            cursor.execute('''
+                UPDATE jobs SET status = 'done', result = ?, finished_at = ?, lease_owner = NULL, error = NULL
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            ''', (json.dumps(result), time.time(), job_id, worker_id))
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """Record a failed attempt; the job is retried later until ``max_attempts``."""
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute('SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?',
+                           (job_id, STATUS_LEASED, worker_id))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                cursor.execute('''
+                    UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_owner = NULL WHERE id = ?
+                ''', (error, now, job_id))
+            else:
+                cursor.execute('''
+                    UPDATE jobs SET status = 'queued', error = ?, available_at = ?, lease_owner = NULL WHERE id = ?
+                ''', (error, now + self.retry_delay * 2 ** (attempts - 1), job_id))
+            return True
+
+    def fetch_jobs(self, job_ids: List[int]) -> Dict[int, Dict]:
+        """Return ``{id: {'status', 'result', 'error'}}`` for the given jobs."""
+        jobs = {}
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            for start in range(0, len(job_ids), 500):
+                chunk = job_ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT id, status, result, error FROM jobs WHERE id IN ({','.join('?' * len(chunk))})
+                ''', chunk)
+                for job_id, status, result, error in cursor.fetchall():
+                    jobs[job_id] = {'status': status, 'result': json.loads(result) if result else None,
+                                    'error': error}
+        return jobs
+
+    def wait(self, job_ids: List[int], timeout: Optional[float] = None, poll_interval: float = 1.0) -> Dict[int, Dict]:
+        """Block until every job is done or failed, or ``timeout`` runs out."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            jobs = self.fetch_jobs(job_ids)
+            pending = [job_id for job_id, job in jobs.items() if job['status'] not in (STATUS_DONE, STATUS_FAILED)]
+            if not pending or (deadline and time.monotonic() >= deadline):
+                if pending:
+                    logging.warning(f"{len(pending)} of {len(job_ids)} jobs still pending after {timeout}s")
+                return jobs
+            time.sleep(poll_interval)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+            return dict(cursor.fetchall())
+
+    def purge(self, older_than: float = 7 * 86400) -> int:
+        """Delete finished jobs older than ``older_than`` seconds."""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                           (time.time() - older_than,))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def new_worker_id() -> str:
+    """Identify a worker process uniquely across hosts."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue configured under ``queue``."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            options = config.get('queue') or {}
+            _queue = JobQueue(
+                path=options.get('path', 'job_queue.db'),
+                visibility_timeout=options.get('visibility_timeout', 300),
+                max_attempts=options.get('max_attempts', 3),
+                retry_delay=options.get('retry_delay', 30),
+                dedup_window=options.get('dedup_window', 3600),
+            )
+        return _queue
@@ -0,0 +1,123 @@
+import time
+import random
+import logging
+from typing import Dict, Iterator, List, Optional
+
+from config_loader import load_config
+from database.database import DatabaseHandler, get_database
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+class ListingScheduler:
+    """Decide when every listing (product URL) is checked next.
+
+    Each listing keeps its own ``check_interval`` and ``next_due_at`` in the
+    database. A check that finds a new price shrinks the interval by
+    ``speedup``; an unchanged price stretches it by ``slowdown``, within
+    ``[min_interval, max_interval]``, so capacity goes to listings whose
+    prices move. Failed checks are retried after ``retry_interval`` (doubling)
+    without touching the interval. A random ``jitter`` keeps listings from
+    bunching up at the same time of day.
+
+    Because a listing only moves forward once its result is recorded, a cycle
+    interrupted by a crash resumes with exactly the listings it had not
+    finished. The listings themselves come from the catalog in the database
+    (see ``catalog.catalog``).
+    """
+
+    def __init__(self, db: Optional[DatabaseHandler] = None, default_interval: float = 86400,
+                 min_interval: float = 3600, max_interval: float = 7 * 86400, speedup: float = 0.5,
+                 slowdown: float = 1.5, retry_interval: float = 900, jitter: float = 0.1,
+                 batch_size: int = 50, max_per_tick: Optional[int] = 1000):
+        self.db = db or get_database()
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.retry_interval = retry_interval
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.max_per_tick = max_per_tick
+
+    def iter_due_products(self, now: Optional[float] = None) -> Iterator[List[Dict]]:
+        """Yield the due listings as ``[{'name': .., 'urls': [..], 'due': {url: next_due_at}}, ...]`` chunks.
+
+        Each chunk holds at most ``batch_size`` listings, most overdue first,
+        and is read from the database only when the previous one has been
+        consumed. Stops after ``max_per_tick`` listings so a large backlog is
+        worked off over several ticks.
+        """
+        now = time.time() if now is None else now
+        after = None
+        remaining = self.max_per_tick
+        while remaining is None or remaining > 0:
+            limit = self.batch_size if remaining is None else min(self.batch_size, remaining)
+            rows = self.db.fetch_due_listings(now, limit, after)
+            if not rows:
+                return
+            after = rows[-1][-2:]
+            if remaining is not None:
+                remaining -= len(rows)
+
+            due = {}
+            for name, url, *_, next_due_at, _ in rows:
+                due.setdefault(name, {})[url] = next_due_at
+            yield [{'name': name, 'urls': list(urls), 'due': urls} for name, urls in due.items()]
+
+    def _spread(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def next_check(self, schedule, result: Optional[Dict], now: float):
+        """Return (next_due_at, check_interval, last_price, failures) after a check."""
+        interval, last_price, last_checked_at, failures = schedule or (None, None, None, 0)
+        interval = interval or self.default_interval
+
+        if not result or not result.get('success'):
+            failures += 1
+            delay = min(self.retry_interval * 2 ** (failures - 1), interval)
+            return now + delay, interval, last_price, failures
+
+        price = result.get('price')
+        if last_checked_at is not None:
+            if price != last_price and not result.get('unchanged'):
+                interval = max(self.min_interval, interval * self.speedup)
+            else:
+                interval = min(self.max_interval, interval * self.slowdown)
+        return now + self._spread(interval), interval, price, 0
+
+    def record(self, results: List[Dict], now: Optional[float] = None):
+        """Checkpoint a batch: move every scraped listing to its next due time."""
+        now = time.time() if now is None else now
+        updates = []
+        for result in results:
+            name = result['product']['name']
+            for url, listing in (result.get('listings') or {}).items():
+                schedule = self.db.fetch_listing_schedule(name, url)
+                due, interval, price, failures = self.next_check(schedule, listing, now)
+                title = listing.get('title') if listing and listing.get('success') else None
+                updates.append((due, interval, price, now, failures, title, name, url))
+        self.db.update_listing_schedule(updates)
+        if updates:
+            soonest = min(update[0] for update in updates)
+            logging.info(f"Rescheduled {len(updates)} listings, next due in {(soonest - now) / 60:.0f} min")
+
+
+def get_listing_scheduler(db: Optional[DatabaseHandler] = None) -> ListingScheduler:
+    """Build the listing scheduler from the ``schedule`` section of the config."""
+    options = config.get('schedule') or {}
+    return ListingScheduler(
+        db=db,
+        default_interval=options.get('default_interval', 86400),
+        min_interval=options.get('min_interval', 3600),
+        max_interval=options.get('max_interval', 7 * 86400),
+        speedup=options.get('speedup', 0.5),
+        slowdown=options.get('slowdown', 1.5),
+        retry_interval=options.get('retry_interval', 900),
+        jitter=options.get('jitter', 0.1),
+        batch_size=options.get('batch_size', 50),
+        max_per_tick=options.get('max_per_tick', 1000),
+    )
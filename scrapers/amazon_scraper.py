@@ -1,57 +1,54 @@
 # scrapers/amazon_scraper.py
 
-import time
-import requests
-import random
 import logging
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from typing import Optional, Dict
-from config_loader import load_config
+from typing import Optional
 
 # Importing the base scraper class that this scraper will extend
 from scrapers.scraper import BaseScraper, register_scraper
+from scrapers.parsing import SelectorSet, parse_price
 
-# Selenium imports
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-
-# Load configuration from YAML file
-config = load_config()
 
 # Register the scraper with a URL pattern
 @register_scraper(r"amazon\.com(\.br)?")
 class AmazonScraper(BaseScraper):
     """Amazon Scraper class to scrape product prices and titles from Amazon pages."""
 
-    def __init__(self):
-        self.user_agent = random.choice(config['scraping']['user_agents'])
-        self.currency = config['websites']['amazon']['currency']
-        self.timeout = config['scraping']['request_timeout']
-        self.retry_attempts = config['scraping']['retry_attempts']
-        self.delay_range = (1, config['scraping']['timeout_between_requests'])
+    site = 'amazon'
+    wait_selector = 'div#centerCol'
+    price_wait_selector = 'div#centerCol span.a-price span.a-offscreen, span#subscriptionPrice span.a-price'
+    price_regions = ['span#subscriptionPrice', 'div#centerCol span.a-price']
+    parse_regions = [
+        ('div', 'id', 'centerCol'),
+        ('span', 'id', 'subscriptionPrice'),
+        ('span', 'class', 'a-price'),
+        ('span', 'id', 'productTitle'),
+        ('h1', 'id', 'title'),
+        ('script', 'type', 'application/ld+json'),
+    ]
+    # Amazon's robot check page posts to /errors/validateCaptcha
+    captcha_markers = [b'/errors/validateCaptcha', b'g-recaptcha']
 
-    def _get_random_delay(self):
-        return random.uniform(*self.delay_range)
+    # Selectors are compiled once for all pages
+    price_selectors = SelectorSet([
+        'span#subscriptionPrice span.a-price span.a-offscreen',
+        'div#centerCol span.a-price span.a-offscreen',
+        'span.a-price span[aria-hidden="true"]'
+    ])
+    title_selectors = SelectorSet([
+        'span#productTitle',
+        'h1#title'
+    ])
 
     def _extract_price(self, soup: BeautifulSoup) -> Optional[float]:
         """Extract price from page using multiple possible selectors"""
-        selectors = [
-            'span#subscriptionPrice span.a-price span.a-offscreen',
-            'div#centerCol span.a-price span.a-offscreen',
-            'span.a-price span[aria-hidden="true"]'
-        ]
-
-        for selector in selectors:
-            price_element = soup.select_one(selector)
+        for selector, compiled in self.price_selectors:
+            price_element = compiled.select_one(soup)
             if price_element:
                 try:
                     price_text = price_element.get_text(strip=True)
-                    return float(price_text.replace(self.currency, '').replace(',', '.').strip())
+                    return parse_price(price_text, self.currency)
                 except (ValueError, AttributeError) as e:
                     logging.warning(f"Price extraction failed with selector {selector}: {e} \n\n{price_text}\n\n")
                     continue
@@ -61,74 +58,19 @@ class AmazonScraper(BaseScraper):
 
     def _extract_product_title(self, soup: BeautifulSoup) -> Optional[str]:
         """Extract product title"""
-        title_selectors = [
-            'span#productTitle',
-            'h1#title'
-        ]
-        
-        for selector in title_selectors:
-            title_element = soup.select_one(selector)
-            if title_element:
-                return title_element.get_text(strip=True)
+        title_element = self.title_selectors.select_one(soup)
+        if title_element:
+            return title_element.get_text(strip=True)
         return None           
            
             
 
-    def scrape_product(self, url: str) -> Optional[Dict]:
-        """Main scraping method with retry logic"""
-
-        for attempt in range(self.retry_attempts):
-            try:
-                time.sleep(self._get_random_delay())
-                
-                options = Options()
-                options.add_argument("--headless=new")
-                options.add_argument(f"user-agent={random.choice(self.user_agent)}")
-                options.add_argument("--disable-blink-features=AutomationControlled")
-                
-                # Set up Selenium WebDriver
-                driver = webdriver.Chrome(options=options)
-                driver.get(url)                
-                
-                # Wait for price to load
-                WebDriverWait(driver, self.timeout).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div#centerCol"))
-                )
-              
-                # 3. Get fully rendered page source
-                page_source = driver.page_source
-                
-                # 4. Switch to BeautifulSoup for parsing
-                soup = BeautifulSoup(page_source, 'lxml')
-                
-                
-                return {
-                    'price': self._extract_price(soup),
-                    'title': self._extract_product_title(soup),
-                    'currency': self.currency,
-                    'url': url,
-                    'success': True
-                }
-                
-            except requests.exceptions.RequestException as e:
-                logging.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt == self.retry_attempts - 1:
-                    logging.error(f"Final scraping failure for {url}")
-                    return {
-                        'price': None,
-                        'title': None,
-                        'currency': self.currency,
-                        'url': url,
-                        'success': False
-                    }
-            finally:
-                driver.quit()
-                logging.info("Selenium driver closed")
-
     def get_product_id(self, url: str) -> Optional[str]:
         """Extract ASIN from Amazon URL"""
         parsed = urlparse(url)
-        path_segments = parsed.path.split('/')
-        if 'dp' in path_segments:
-            return path_segments[path_segments.index('dp') + 1]
+        path_segments = [segment for segment in parsed.path.split('/') if segment]
+        # /dp/<ASIN>, /<slug>/dp/<ASIN> and /gp/product/<ASIN>
+        for marker in ('dp', 'product'):
+            if marker in path_segments[:-1]:
+                return path_segments[path_segments.index(marker) + 1].upper()
         return None
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from config_loader import load_config
+from scrapers import scraper as Scraper
+from scrapers.engine import log_tier_stats, merge_results, plan_scrape
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+class AsyncScrapeEngine:
+    """Scrape product URLs as coroutines on a single event loop.
+
+    All requests share one aiohttp connection pool and every site gets its own
+    ``asyncio.Semaphore``, so thousands of URLs can be in flight without a
+    thread per request. Must be used from the shared loop in
+    ``scheduler.event_loop``.
+    """
+
+    def __init__(self, max_connections: Optional[int] = None, workers_per_site: Optional[int] = None):
+        scraping = config['scraping']
+        self.max_connections = max_connections or scraping.get('max_connections', 100)
+        self.workers_per_site = workers_per_site or scraping.get('async_workers_per_site', 10)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._site_semaphores = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            scraping = config['scraping']
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.workers_per_site)
+            headers = dict(scraping.get('headers') or {})
+            headers['User-Agent'] = scraping['user_agents'][0]
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers)
+        return self._session
+
+    def _site_semaphore(self, site: str) -> asyncio.Semaphore:
+        if site not in self._site_semaphores:
+            self._site_semaphores[site] = asyncio.Semaphore(self.workers_per_site)
+        return self._site_semaphores[site]
+
+    async def _scrape_url(self, scraper: Scraper.BaseScraper, url: str) -> Optional[Dict]:
+        async with self._site_semaphore(scraper.site):
+            logging.info(f"Scraping URL: {url}")
+            try:
+                return await scraper.scrape_product_async(url, self._get_session())
+            except Exception as e:
+                logging.error(f"Unexpected error scraping {url}: {e}")
+                return None
+
+    async def run(self, products: List[Dict]) -> List[Dict]:
+        """Async counterpart of ``ScrapeEngine.run`` with the same result format."""
+        tasks = plan_scrape(products)
+
+        product_results = await asyncio.gather(*[
+            asyncio.gather(*[self._scrape_url(scraper, url) for scraper, url in urls])
+            for _, urls in tasks
+        ])
+        results = [
+            merge_results(product, scraped_results, [url for _, url in urls])
+            for (product, urls), scraped_results in zip(tasks, product_results)
+        ]
+
+        log_tier_stats()
+        return results
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,111 @@
+import sys
+import json
+import time
+import logging
+from typing import Optional, Tuple
+
+from monitoring import metrics
+
+# Selenium is heavy to import and only the browser tier needs it, so it is
+# imported inside the functions below, on the first page that needs a browser.
+
+
+class BrowserError(Exception):
+    """A page could not be rendered (wraps Selenium's ``WebDriverException``)."""
+
+    def __init__(self, message: str, timeout: bool = False):
+        super().__init__(message)
+        self.timeout = timeout
+
+
+def _network_usage(driver) -> Tuple[int, int, int]:
+    """Bytes received, requests finished and requests blocked since the last call.
+
+    Reads (and so clears) the browser's performance log.
+    """
+    received = finished = blocked = 0
+    for entry in driver.get_log('performance'):
+        message = entry['message']
+        if 'Network.loadingFinished' in message:
+            received += json.loads(message)['message']['params'].get('encodedDataLength', 0)
+            finished += 1
+        elif 'Network.loadingFailed' in message and 'blockedReason' in message:
+            blocked += 1
+    return int(received), finished, blocked
+
+
+def _page_ready(wait_selector: str, price_selector: Optional[str], grace: float):
+    """Wait condition of a lean browser: the price is rendered, or the page
+    has no price (``wait_selector`` is present) and either finished loading
+    or had ``grace`` seconds to render one.
+
+    With an "eager" page load strategy the DOM is already parsed when the
+    wait starts, but JS-rendered prices arrive later.
+    """
+    from selenium.webdriver.common.by import By
+
+    started = time.monotonic()
+
+    def ready(driver):
+        if price_selector and driver.find_elements(By.CSS_SELECTOR, price_selector):
+            return True
+        if not driver.find_elements(By.CSS_SELECTOR, wait_selector):
+            return False
+        return (time.monotonic() - started >= grace
+                or driver.execute_script("return document.readyState") == 'complete')
+
+    return ready
+
+
+def render_page(url: str, wait_selector: str, timeout: float, site: Optional[str] = None,
+                price_selector: Optional[str] = None) -> str:
+    """Load ``url`` in a pooled browser, wait for ``wait_selector`` and return the source.
+
+    In lean mode (``scraping.browser.lean``) the wait ends as soon as
+    ``price_selector`` matches, and whatever is still loading is cancelled.
+    """
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from scrapers.driver_pool import get_driver_pool
+
+    pool = get_driver_pool()
+    started = time.perf_counter()
+    try:
+        with pool.lease() as driver:
+            metrics.observe('driver_acquire', time.perf_counter() - started, site)
+            # Drop the network events of the previous page and of the reset
+            _network_usage(driver)
+            loading = time.perf_counter()
+            with metrics.span('page_load', site):
+                driver.get(url)
+
+            # Wait for price to load
+            with metrics.span('wait', site):
+                if pool.lean:
+                    WebDriverWait(driver, timeout).until(_page_ready(wait_selector, price_selector, pool.price_grace))
+                    driver.execute_script("window.stop();")
+                else:
+                    WebDriverWait(driver, timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                    )
+            page_source = driver.page_source
+            load_time = time.perf_counter() - loading
+            received, finished, blocked = _network_usage(driver)
+    except WebDriverException as e:
+        raise BrowserError(str(e), timeout=isinstance(e, TimeoutException)) from e
+
+    metrics.observe('browser_page', load_time, site)
+    metrics.inc('browser_bytes_total', received, site=site)
+    metrics.inc('browser_blocked_requests_total', blocked, site=site)
+    logging.info(f"Rendered {url} in {load_time:.2f}s: {received / 1024:.0f} KiB in {finished} requests, "
+                 f"{blocked} blocked")
+    return page_source
+
+
+def close_browsers():
+    """Quit the pooled browsers, if any browser was ever started."""
+    driver_pool = sys.modules.get('scrapers.driver_pool')
+    if driver_pool is not None and driver_pool._pool is not None:
+        driver_pool._pool.close_all()
@@ -0,0 +1,55 @@
+import logging
+from typing import Dict, List, Optional
+
+from config_loader import load_config
+from scheduler.job_queue import STATUS_DONE, JobQueue, get_job_queue
+from scrapers.engine import merge_results, plan_scrape
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+class DistributedScrapeEngine:
+    """Hand product URLs to worker processes through the shared job queue.
+
+    The coordinator (``main.py``) never opens a page itself: it enqueues one
+    job per URL, deduplicated on the URL and its due time, and waits for ``scrapers.worker``
+    processes, on this or other machines, to report the results. A restarted
+    coordinator re-attaches to the jobs of the interrupted cycle instead of
+    scraping everything again. Returns the same format as ``ScrapeEngine.run``.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None, cycle_timeout: Optional[float] = None):
+        self.queue = queue or get_job_queue()
+        self.cycle_timeout = cycle_timeout or (config.get('queue') or {}).get('cycle_timeout', 3600)
+
+    def _dedup_key(self, product: Dict, url: str) -> str:
+        """One job per URL and due time: a restarted cycle re-attaches to its jobs, but a
+        listing that comes due again is scraped again whatever the dedup window."""
+        due = (product.get('due') or {}).get(url)
+        return url if due is None else f"{url}@{due}"
+
+    def run(self, products: List[Dict]) -> List[Dict]:
+        tasks = plan_scrape(products)
+        job_ids = [
+            [self.queue.enqueue({'url': url, 'product': product['name']}, dedup_key=self._dedup_key(product, url))
+             for _, url in urls]
+            for product, urls in tasks
+        ]
+        all_ids = [job_id for ids in job_ids for job_id in ids]
+        logging.info(f"Enqueued {len(all_ids)} scrape jobs, waiting for workers")
+
+        jobs = self.queue.wait(all_ids, timeout=self.cycle_timeout)
+        for job_id, job in jobs.items():
+            if job['status'] != STATUS_DONE:
+                logging.error(f"Scrape job {job_id} ended as {job['status']}: {job['error']}")
+        logging.info(f"Job queue: {self.queue.stats()}")
+
+        return [
+            merge_results(product, [
+                jobs[job_id]['result'] if jobs.get(job_id, {}).get('status') == STATUS_DONE else None
+                for job_id in ids
+            ], [url for _, url in urls])
+            for (product, urls), ids in zip(tasks, job_ids)
+        ]
@@ -0,0 +1,187 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from config_loader import load_config
+
+# Selenium imports
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+
+# Load configuration from YAML file
+config = load_config()
+
+# Extensions of the resources a lean browser never downloads: the price is
+# in the markup, not in these
+BLOCKED_EXTENSIONS = [
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'svg', 'ico',   # images
+    'woff', 'woff2', 'ttf', 'otf', 'eot',                        # fonts
+    'mp4', 'webm', 'm3u8', 'mp3', 'ogg',                         # audio and video
+]
+# The same as Network.setBlockedURLs patterns, with and without a query string
+BLOCKED_RESOURCES = [pattern for ext in BLOCKED_EXTENSIONS for pattern in (f'*.{ext}', f'*.{ext}?*')]
+
+
+class DriverPool:
+    """Pool of warm headless Chrome instances shared by all scrapers.
+
+    Drivers are created lazily up to ``size`` and handed out with ``lease()``.
+    When a lease ends the browser state (cookies, storage) is reset so the next
+    page starts clean. A driver is recycled after ``max_pages`` pages or as soon
+    as it raises a ``WebDriverException`` while leased.
+
+    ``lean`` browsers skip images, fonts, media and the ``blocked_urls``
+    (ads and trackers), and use ``page_load_strategy`` ("eager" returns at
+    DOMContentLoaded, "none" right away) so ``render_page`` can stop
+    waiting as soon as the price is rendered. A page without a price is
+    only given up on once it finished loading, or after ``price_grace``
+    seconds.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 50, lean: bool = False,
+                 page_load_strategy: str = 'eager', blocked_urls: Optional[List[str]] = None,
+                 price_grace: float = 5.0):
+        self.size = size
+        self.max_pages = max_pages
+        self.lean = lean
+        self.page_load_strategy = page_load_strategy
+        self.price_grace = price_grace
+        self.blocked_urls = BLOCKED_RESOURCES + list(blocked_urls or [])
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_driver(self) -> webdriver.Chrome:
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument(f"user-agent={random.choice(config['scraping']['user_agents'])}")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        # Network events, to report the bytes each page transferred
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        if self.lean:
+            options.page_load_strategy = self.page_load_strategy
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.managed_default_content_settings.fonts': 2,
+            })
+
+        driver = webdriver.Chrome(options=options)
+        if self.lean:
+            try:
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+            except WebDriverException:
+                driver.quit()
+                raise
+        with self._lock:
+            self._pages[id(driver)] = 0
+        logging.info("Selenium driver started")
+        return driver
+
+    def _quit_driver(self, driver: webdriver.Chrome):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logging.warning(f"Failed to quit Selenium driver cleanly: {e}")
+        logging.info("Selenium driver closed")
+
+    def _reset_driver(self, driver: webdriver.Chrome) -> bool:
+        """Clear per-page state. Returns False when the driver is unusable."""
+        try:
+            # delete_all_cookies() only reaches the current domain; these clear every site
+            origin = '{0.scheme}://{0.netloc}'.format(urlsplit(driver.current_url))
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            if origin.startswith('http'):
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            driver.get("about:blank")
+        except WebDriverException as e:
+            logging.warning(f"Selenium driver reset failed, recycling it: {e}")
+            return False
+        return True
+
+    def _acquire(self) -> webdriver.Chrome:
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._create_driver()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, driver: webdriver.Chrome, crashed: bool):
+        try:
+            with self._lock:
+                self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+                pages = self._pages[id(driver)]
+
+            if self._closed or crashed or pages >= self.max_pages or not self._reset_driver(driver):
+                self._quit_driver(driver)
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self):
+        """Lease a driver for the duration of the ``with`` block."""
+        driver = self._acquire()
+        crashed = False
+        try:
+            yield driver
+        except TimeoutException:
+            # A slow page is not a broken browser, keep the driver
+            raise
+        except WebDriverException:
+            crashed = True
+            raise
+        finally:
+            self._release(driver, crashed)
+
+    def close_all(self):
+        """Quit every idle driver. Leased drivers are quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit_driver(driver)
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the process-wide driver pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            scraping = config['scraping']
+            browser = scraping.get('browser') or {}
+            _pool = DriverPool(
+                size=scraping.get('driver_pool_size', 2),
+                max_pages=scraping.get('driver_max_pages', 50),
+                lean=browser.get('lean', False),
+                page_load_strategy=browser.get('page_load_strategy', 'eager'),
+                blocked_urls=browser.get('blocked_urls'),
+                price_grace=browser.get('price_grace', 5.0),
+            )
+            atexit.register(_pool.close_all)
+        return _pool
@@ -0,0 +1,128 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config_loader import load_config
+from scrapers import scraper as Scraper
+from scrapers.page_cache import get_page_cache
+from scrapers.rate_limiter import get_limiter_stats
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+def plan_scrape(products: List[Dict]) -> List[Tuple[Dict, List[Tuple[Scraper.BaseScraper, str]]]]:
+    """Resolve a scraper for every product URL, skipping unsupported ones."""
+    # Route all URLs in one pass; every site shares one scraper instance
+    routes, unsupported = Scraper.route_many([url for product in products for url in product.get('urls') or []])
+    scrapers = {url: route.scraper for route in routes.values() for url in route.urls}
+    for url in unsupported:
+        logging.error(f"No scraper available for URL: {url}")
+
+    tasks = []
+    for product in products:
+        if not product.get('urls'):
+            logging.error(f"No URLs found for product: {product['name']}")
+            continue
+        tasks.append((product, [(scrapers[url], url) for url in product['urls'] if url in scrapers]))
+    return tasks
+
+
+def merge_results(product: Dict, scraped_results: List[Optional[Dict]], urls: List[str]) -> Dict:
+    """Pair a product with the results of its URLs (``{url: result}``).
+
+    A listing whose scrape raised is ``None``; choosing the best offer is up
+    to the caller (see ``catalog.product_index``).
+    """
+    return {'product': product, 'listings': dict(zip(urls, scraped_results))}
+
+
+def log_tier_stats():
+    for site, tiers in Scraper.get_tier_stats().items():
+        total = sum(tiers.values())
+        logging.info(f"Fetch tiers for {site}: {tiers} (HTTP hit rate {tiers[Scraper.TIER_HTTP] / total:.0%})")
+    for site, stats in get_limiter_stats().items():
+        logging.info(f"Rate limiter for {site}: {stats}")
+    cache = get_page_cache()
+    if cache is not None:
+        logging.info(f"Page cache: {cache.stats()}")
+
+
+class ScrapeEngine:
+    """Fan product URLs out across a bounded pool of worker threads.
+
+    Every site has its own queue of URLs and at most ``workers_per_site`` of
+    them in the pool at once; the next URL of a site is only submitted when
+    one of its scrapes finishes. A long backlog on one site therefore never
+    occupies threads that another site could use, and different sites run in
+    parallel. How often a site is actually hit is decided by its shared
+    ``DomainLimiter`` (see ``scrapers.rate_limiter``), which every scraper
+    consults before each request.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, workers_per_site: Optional[int] = None):
+        scraping = config['scraping']
+        self.max_workers = max_workers or scraping.get('max_workers', 4)
+        self.workers_per_site = workers_per_site or scraping.get('workers_per_site', 1)
+
+    def _scrape_url(self, scraper: Scraper.BaseScraper, url: str) -> Optional[Dict]:
+        logging.info(f"Scraping URL: {url}")
+        try:
+            return scraper.scrape_product(url)
+        except Exception as e:
+            logging.error(f"Unexpected error scraping {url}: {e}")
+            return None
+
+    def run(self, products: List[Dict]) -> List[Dict]:
+        """Scrape every URL of every product and merge the results per product.
+
+        Returns a list of ``{'product': product, 'listings': {url: result}}``
+        in the same order as ``products``.
+        """
+        tasks = plan_scrape(products)
+
+        # site -> queue of (task index, url index, scraper, url)
+        pending: Dict[str, deque] = {}
+        for i, (_, urls) in enumerate(tasks):
+            for j, (scraper, url) in enumerate(urls):
+                pending.setdefault(scraper.site, deque()).append((i, j, scraper, url))
+        scraped = [[None] * len(urls) for _, urls in tasks]
+        remaining = sum(len(urls) for _, urls in tasks)
+        # Reentrant: a callback runs in the submitting thread when its future is already done
+        lock = threading.RLock()
+        done = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scraper') as executor:
+            def submit_next(site: str):
+                i, j, scraper, url = pending[site].popleft()
+                future = executor.submit(self._scrape_url, scraper, url)
+                future.add_done_callback(lambda future: finished(site, i, j, future))
+
+            def finished(site: str, i: int, j: int, future):
+                nonlocal remaining
+                with lock:
+                    scraped[i][j] = future.result() if future.exception() is None else None
+                    remaining -= 1
+                    if pending[site]:
+                        submit_next(site)
+                    if not remaining:
+                        done.set()
+
+            with lock:
+                if not remaining:
+                    done.set()
+                for site, queue in pending.items():
+                    for _ in range(min(self.workers_per_site, len(queue))):
+                        submit_next(site)
+            done.wait()
+
+        results = [
+            merge_results(product, scraped[i], [url for _, url in urls])
+            for i, (product, urls) in enumerate(tasks)
+        ]
+
+        log_tier_stats()
+        return results
@@ -0,0 +1,156 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from typing import Dict, Optional
+
+from config_loader import load_config
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+def content_hash(content) -> str:
+    """Stable hash of a page body or fragment."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class PageCache:
+    """Persistent per-URL cache of validators, content hashes and results.
+
+    For every URL the cache keeps the ``ETag``/``Last-Modified`` validators,
+    a hash of the whole body, a hash of the price-relevant DOM fragment and
+    the last extracted result. Entries older than ``ttl`` seconds are ignored
+    and the least recently used entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, path: str = 'page_cache.db', ttl: int = 86400, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.unchanged = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS page_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_hash TEXT,
+                    fragment_hash TEXT,
+                    result TEXT,
+                    stored_at REAL,
+                    accessed_at REAL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache (accessed_at)')
+            self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for ``url``, or None if missing or expired."""
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                SELECT etag, last_modified, body_hash, fragment_hash, result, stored_at
+                FROM page_cache WHERE url = ?
+            ''', (url,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            if time.time() - row[5] > self.ttl:
+                cursor.execute('DELETE FROM page_cache WHERE url = ?', (url,))
+                self._conn.commit()
+                return None
+            return {
+                'etag': row[0],
+                'last_modified': row[1],
+                'body_hash': row[2],
+                'fragment_hash': row[3],
+                'result': json.loads(row[4]) if row[4] else None,
+            }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, result: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            body_hash: Optional[str] = None, fragment_hash: Optional[str] = None):
+        now = time.time()
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO page_cache
+                    (url, etag, last_modified, body_hash, fragment_hash, result, stored_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, etag, last_modified, body_hash, fragment_hash, json.dumps(result), now, now))
+            self._evict(cursor)
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """Refresh an entry that was revalidated without changes."""
+        now = time.time()
+        with self._lock, closing(self._conn.cursor()) as cursor:
+            cursor.execute('UPDATE page_cache SET stored_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+            self._conn.commit()
+
+    def _evict(self, cursor):
+        cursor.execute('SELECT COUNT(*) FROM page_cache')
+        excess = cursor.fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor.execute('''
+                DELETE FROM page_cache WHERE url IN (
+                    SELECT url FROM page_cache ORDER BY accessed_at ASC LIMIT ?
+                )
+            ''', (excess,))
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def record_unchanged(self):
+        with self._lock:
+            self.unchanged += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'unchanged': self.unchanged}
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None when caching is disabled."""
+    global _cache
+    cache_config = config.get('cache') or {}
+    if not cache_config.get('enabled', True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(
+                path=cache_config.get('path', 'page_cache.db'),
+                ttl=cache_config.get('ttl', 86400),
+                max_entries=cache_config.get('max_entries', 10000),
+            )
+        return _cache
@@ -0,0 +1,98 @@
+import re
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Iterator, List, Optional, Tuple
+
+
+class SelectorSet:
+    """CSS selectors compiled once and reused for every page.
+
+    Iterating yields ``(selector, compiled)`` pairs so callers can still log
+    the selector text that matched or failed.
+    """
+
+    def __init__(self, selectors: List[str]):
+        self.selectors = [(selector, soupsieve.compile(selector)) for selector in selectors]
+
+    def __iter__(self) -> Iterator[Tuple[str, soupsieve.SoupSieve]]:
+        return iter(self.selectors)
+
+    def select_one(self, soup: BeautifulSoup):
+        """Return the first element matched by any selector, in selector order."""
+        for _, compiled in self.selectors:
+            element = compiled.select_one(soup)
+            if element is not None:
+                return element
+        return None
+
+
+# A region is (tag name, attribute, value), e.g. ('div', 'id', 'centerCol').
+# For the 'class' attribute the value must be one of the tag's classes.
+Region = Tuple[str, str, str]
+
+
+def _attr_matches(attr: str, actual, expected: str) -> bool:
+    if actual is None:
+        return False
+    if attr == 'class':
+        classes = actual.split() if isinstance(actual, str) else actual
+        return expected in classes
+    return actual == expected
+
+
+class RegionStrainer(SoupStrainer):
+    """Strainer that keeps only the given regions (and their whole subtrees).
+
+    The parser only asks the strainer about top-level tags, so everything
+    nested in a kept region is preserved in document order and selectors
+    anchored on the region match exactly as on the full page.
+    """
+
+    def __init__(self, regions: List[Region]):
+        super().__init__()
+        self.regions = regions
+
+    def matches_region(self, name: str, attrs) -> bool:
+        attrs = attrs or {}
+        return any(
+            name == tag and _attr_matches(attr, attrs.get(attr), value)
+            for tag, attr, value in self.regions
+        )
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self.matches_region(name, attrs)
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self.matches_region(markup_name, markup_attrs)
+
+
+def make_strainer(regions: List[Region]) -> SoupStrainer:
+    """Build a strainer that only keeps the given regions."""
+    return RegionStrainer(regions)
+
+
+def parse_page(content, strainer: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse a page, restricted to the strainer's regions when one is given."""
+    return BeautifulSoup(content, 'lxml', parse_only=strainer)
+
+
+# The last separator followed by one or two digits is the decimal one
+_DECIMAL_PART = re.compile(r'^(.*)[.,](\d{1,2})$')
+
+
+def parse_price(text: str, currency: str = '') -> float:
+    """Parse a displayed price such as ``R$ 3.799,00``, ``R$3799,00``, ``1.299`` or ``$1,299.99``.
+
+    Any other ``.`` or ``,`` groups thousands. Raises ValueError when no
+    number is left.
+    """
+    amount = text.replace(currency, '') if currency else text
+    amount = re.sub(r'[^\d.,]', '', amount)
+    match = _DECIMAL_PART.match(amount)
+    whole, decimals = (match.group(1), match.group(2)) if match else (amount, '')
+    whole = re.sub(r'[.,]', '', whole)
+    if not whole and not decimals:
+        raise ValueError(f"No price in {text!r}")
+    return float(f"{whole or 0}.{decimals or 0}")
@@ -0,0 +1,179 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+from config_loader import load_config
+from monitoring import metrics
+
+
+# Load configuration from YAML file
+config = load_config()
+
+# Outcomes of a request, as reported to ``DomainLimiter.record``
+OUTCOME_OK = 'ok'
+OUTCOME_ERROR = 'error'        # network error, timeout or 5xx
+OUTCOME_BLOCKED = 'blocked'    # 403/429/503 or a CAPTCHA page
+
+# Circuit breaker states
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a domain that is paused."""
+
+
+class BlockedError(Exception):
+    """The site answered with a block or CAPTCHA page instead of the product."""
+
+
+class DomainLimiter:
+    """Token bucket with an AIMD-adjusted rate and a circuit breaker, for one site.
+
+    Every request first reserves a token; the bucket refills at ``rate``
+    requests per second. Each fast, successful response adds
+    ``increase`` to the rate (up to ``max_rate``); a block, a CAPTCHA, an
+    error or a response much slower than usual multiplies it by
+    ``decrease`` (down to ``min_rate``). After ``failure_threshold``
+    consecutive failures the circuit opens and the domain is paused for
+    ``cooldown`` seconds, doubling on every trip up to ``max_cooldown``; then
+    a single trial request decides whether it closes again.
+
+    Safe to use from worker threads and from the event loop at the same time.
+    """
+
+    def __init__(self, site: str, rate: float = 0.5, min_rate: float = 0.05, max_rate: float = 2.0,
+                 burst: float = 1.0, increase: float = 0.05, decrease: float = 0.5,
+                 slow_factor: float = 3.0, jitter: float = 0.2, failure_threshold: int = 5,
+                 cooldown: float = 60.0, max_cooldown: float = 1800.0):
+        self.site = site
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.jitter = jitter
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self._trial_in_flight = False
+        # Moving average of successful latencies, per kind of fetch (http/browser)
+        self.latency: Dict[str, float] = {}
+        self.stats = {OUTCOME_OK: 0, OUTCOME_ERROR: 0, OUTCOME_BLOCKED: 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def _check_circuit(self, now: float):
+        if self.state == CIRCUIT_OPEN and now >= self.open_until:
+            self.state = CIRCUIT_HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == CIRCUIT_OPEN or (self.state == CIRCUIT_HALF_OPEN and self._trial_in_flight):
+            self.stats['rejected'] += 1
+            raise CircuitOpenError(f"{self.site} is paused for {max(self.open_until - now, 0):.0f}s")
+        if self.state == CIRCUIT_HALF_OPEN:
+            self._trial_in_flight = True
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before sending the request."""
+        with self._lock:
+            now = time.monotonic()
+            self._check_circuit(now)
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            wait *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(wait, 0.0)
+
+    def acquire(self):
+        """Block the calling thread until the request may be sent."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait on the event loop until the request may be sent."""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record(self, outcome: str, latency: Optional[float] = None, kind: str = 'http'):
+        """Adapt the rate and the circuit to the outcome of a request."""
+        with self._lock:
+            self.stats[outcome] += 1
+            baseline = self.latency.get(kind)
+            slow = latency is not None and baseline is not None and latency > baseline * self.slow_factor
+
+            if outcome == OUTCOME_OK:
+                if latency is not None:
+                    self.latency[kind] = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+                if slow:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                else:
+                    self.rate = min(self.max_rate, self.rate + self.increase)
+                self.failures = 0
+                if self.state != CIRCUIT_CLOSED:
+                    logging.info(f"Circuit for {self.site} closed")
+                    self.state = CIRCUIT_CLOSED
+                    self.cooldown = self.base_cooldown
+                self._export()
+                return
+
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state == CIRCUIT_HALF_OPEN:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self.state = CIRCUIT_OPEN
+                self.open_until = time.monotonic() + self.cooldown
+                self._trial_in_flight = False
+                logging.warning(f"Circuit for {self.site} opened for {self.cooldown:.0f}s "
+                                f"after {self.failures} failures ({outcome})")
+            self._export()
+
+    def _export(self):
+        metrics.set_gauge('rate_limit_rps', round(self.rate, 4), site=self.site)
+        metrics.set_gauge('circuit_open', int(self.state == CIRCUIT_OPEN), site=self.site)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, rate=round(self.rate, 3), state=self.state)
+
+
+_limiters: Dict[str, DomainLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(site: str) -> DomainLimiter:
+    """Return the shared limiter for ``site``, created from the config on first use.
+
+    Defaults come from ``scraping.rate_limit`` and can be overridden per site
+    with ``websites.<site>.rate_limit``. Without an explicit ``rate`` the
+    initial rate matches the old average politeness delay.
+    """
+    with _limiters_lock:
+        if site not in _limiters:
+            scraping = config['scraping']
+            options = dict(scraping.get('rate_limit') or {})
+            options.update((config['websites'].get(site) or {}).get('rate_limit') or {})
+            options.setdefault('rate', 2 / (1 + scraping.get('timeout_between_requests', 3)))
+            _limiters[site] = DomainLimiter(site, **options)
+        return _limiters[site]
+
+
+def get_limiter_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.site: limiter.snapshot() for limiter in limiters}
@@ -1,19 +1,135 @@
 import re
+import json
+import asyncio
+import time
+import random
+import logging
+import threading
+import requests
+from collections import Counter
+from requests.adapters import HTTPAdapter
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Optional, Dict, List, NamedTuple, Tuple
+from urllib.parse import urlsplit
+from config_loader import load_config
+from monitoring import metrics
+from scrapers.browser import BrowserError, render_page
+from scrapers.page_cache import PageCache, content_hash, get_page_cache
+from scrapers.parsing import Region, make_strainer, parse_page
+from scrapers.rate_limiter import (BlockedError, CircuitOpenError, OUTCOME_BLOCKED, OUTCOME_ERROR,
+                                   OUTCOME_OK, get_rate_limiter)
 
+if TYPE_CHECKING:
+    import aiohttp
+
+
+# Load configuration from YAML file
+config = load_config()
 
 # Mapping of URL patterns to scraper classes
 SCRAPER_REGISTRY = {}
 
+# Dispatch caches, rebuilt whenever a scraper is registered
+_compiled_patterns: List[Tuple[re.Pattern, type]] = []
+_host_routes: Dict[str, type] = {}
+_instances: Dict[type, 'BaseScraper'] = {}
+_dispatch_lock = threading.Lock()
+
+# Fetch tiers, from cheapest to most expensive
+TIER_HTTP = 'http'
+TIER_BROWSER = 'browser'
+
+# Status codes sites use to turn away scrapers
+BLOCK_STATUSES = {403, 429, 503}
+
+# Number of URLs served by each (site, tier) pair
+_tier_stats = Counter()
+_tier_stats_lock = threading.Lock()
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
 def register_scraper(pattern: str):
     """Decorator to register scraper classes with a URL pattern."""
     def decorator(cls):
         SCRAPER_REGISTRY[pattern] = cls
+        with _dispatch_lock:
+            _compiled_patterns.append((re.compile(pattern, re.IGNORECASE), cls))
+            _host_routes.clear()
         return cls
     return decorator
 
+def get_http_session() -> requests.Session:
+    """Return the shared keep-alive session used by the plain-HTTP tier."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            scraping = config['scraping']
+            session = requests.Session()
+            pool_size = scraping.get('max_workers', 4)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(scraping.get('headers') or {})
+            session.headers.setdefault('Accept-Encoding', 'gzip, deflate')
+            session.headers['User-Agent'] = random.choice(scraping['user_agents'])
+            _http_session = session
+        return _http_session
+
+def record_tier(site: str, tier: str):
+    with _tier_stats_lock:
+        _tier_stats[(site, tier)] += 1
+    metrics.inc('scrapes_total', site=site, outcome=tier)
+
+def get_tier_stats() -> Dict[str, Dict[str, int]]:
+    """Return how many URLs each tier served, per site."""
+    stats = {}
+    with _tier_stats_lock:
+        for (site, tier), count in _tier_stats.items():
+            stats.setdefault(site, {TIER_HTTP: 0, TIER_BROWSER: 0})[tier] = count
+    return stats
+
 class BaseScraper(ABC):
+    # Key of the site in the ``websites`` section of the config
+    site: str = ''
+    # CSS selector that signals the price area has been rendered
+    wait_selector: str = 'body'
+    # CSS selector of the rendered price; a lean browser returns as soon as it matches
+    price_wait_selector: Optional[str] = None
+    # CSS selectors of the price-relevant regions, hashed to detect unchanged pages
+    price_regions: List[str] = []
+    # Regions of the page that extraction needs; empty means parse the whole page
+    parse_regions: List[Region] = []
+    # Byte strings that only appear on CAPTCHA / bot-check pages
+    captcha_markers: List[bytes] = [b'g-recaptcha', b'h-captcha']
+
+    def __init__(self):
+        self.currency = config['websites'][self.site]['currency']
+        self.timeout = config['scraping']['request_timeout']
+        self.retry_attempts = config['scraping']['retry_attempts']
+        self.limiter = get_rate_limiter(self.site)
+        self.http_fast_path = config['scraping'].get('http_fast_path', True)
+        self._strainer = make_strainer(self.parse_regions) if self.parse_regions else None
+
+    def _is_blocked(self, content) -> bool:
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'ignore')
+        return any(marker in content for marker in self.captcha_markers)
+
+    def _check_response(self, status: int, content: bytes, latency: float) -> bool:
+        """Report an HTTP response to the site's limiter; False if it was a block page."""
+        if status in BLOCK_STATUSES or self._is_blocked(content):
+            self.limiter.record(OUTCOME_BLOCKED)
+            return False
+        if status >= 400:
+            # 5xx and other error statuses slow the site down and count towards the breaker
+            self.limiter.record(OUTCOME_ERROR)
+            return True
+        # 2xx, and 304 answers to the page cache's conditional requests
+        self.limiter.record(OUTCOME_OK, latency, TIER_HTTP)
+        return True
+
     @abstractmethod
     def _extract_price(self, soup) -> Optional[float]:
         """Extract price from page using multiple possible selectors"""
@@ -21,25 +137,325 @@ class BaseScraper(ABC):
     def _extract_product_title(self, soup) -> Optional[str]:
         """Extract product title"""
         pass
-    def scrape_product(self, url: str) -> Optional[Dict]: 
+
+    def _extract_json_ld(self, soup: BeautifulSoup) -> Dict:
+        """Extract price and title from embedded schema.org Product JSON-LD, if any."""
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                data = json.loads(script.string or '')
+            except ValueError:
+                continue
+            for item in data if isinstance(data, list) else [data]:
+                if not isinstance(item, dict) or item.get('@type') != 'Product':
+                    continue
+                offers = item.get('offers') or {}
+                if isinstance(offers, list):
+                    offers = offers[0] if offers else {}
+                price = offers.get('price', offers.get('lowPrice'))
+                try:
+                    price = float(price) if price is not None else None
+                except (TypeError, ValueError):
+                    price = None
+                return {'price': price, 'title': item.get('name')}
+        return {}
+
+    def _result(self, url: str, soup: Optional[BeautifulSoup] = None, tier: Optional[str] = None) -> Dict:
+        """Build the scrape result dict; a missing soup means the scrape failed."""
+        return {
+            'price': self._extract_price(soup) if soup is not None else None,
+            'title': self._extract_product_title(soup) if soup is not None else None,
+            'currency': self.currency,
+            'url': url,
+            'success': soup is not None,
+            'tier': tier,
+            'unchanged': False
+        }
+
+    def _parse(self, content) -> BeautifulSoup:
+        """Parse only the regions this scraper extracts from."""
+        with metrics.span('parse', self.site):
+            return parse_page(content, self._strainer)
+
+    def _fragment_hash(self, soup: BeautifulSoup) -> str:
+        """Hash the text of the price-relevant regions of the page."""
+        fragments = []
+        for selector in self.price_regions:
+            fragments.extend(element.get_text(' ', strip=True) for element in soup.select(selector))
+        return content_hash('\x1f'.join(fragments))
+
+    def _store_in_cache(self, url: str, soup: BeautifulSoup, result: Dict, entry: Optional[Dict],
+                        headers=None, body_hash: Optional[str] = None):
+        """Save the result and flag it unchanged when the price regions did not change."""
+        cache = get_page_cache()
+        if cache is None:
+            return
+        fragment_hash = self._fragment_hash(soup)
+        if entry and entry['fragment_hash'] == fragment_hash and entry['result']:
+            result['unchanged'] = True
+            cache.record_unchanged()
+            metrics.inc('cache_total', site=self.site, result='unchanged')
+        headers = headers or {}
+        cache.put(url, result, headers.get('ETag'), headers.get('Last-Modified'), body_hash, fragment_hash)
+
+    def _cached_result(self, url: str, entry: Optional[Dict], status: int, content: bytes) -> Optional[Dict]:
+        """Return the cached result when the server or the body hash says nothing changed."""
+        cache = get_page_cache()
+        if cache is None:
+            return None
+        if entry and entry['result'] and (status == 304 or entry['body_hash'] == content_hash(content)):
+            cache.record_hit()
+            metrics.inc('cache_total', site=self.site, result='hit')
+            cache.touch(url)
+            return dict(entry['result'], tier=TIER_HTTP, unchanged=True)
+        cache.record_miss()
+        metrics.inc('cache_total', site=self.site, result='miss')
+        return None
+
+    def _scrape_http(self, url: str) -> Optional[Dict]:
+        """Cheap tier: fetch the server-rendered HTML without a browser.
+
+        Returns None when the page could not be fetched or no price could be
+        extracted from it, so the caller can escalate to the browser tier.
+        """
+        cache = get_page_cache()
+        entry = cache.get(url) if cache else None
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            with metrics.span('http_fetch', self.site):
+                response = get_http_session().get(url, timeout=self.timeout,
+                                                  headers=PageCache.conditional_headers(entry))
+        except requests.exceptions.RequestException as e:
+            self.limiter.record(OUTCOME_ERROR)
+            logging.info(f"HTTP fetch failed for {url}, falling back to browser: {e}")
+            return None
+        except Exception:
+            # Every reserved request must be recorded, or a half-open circuit keeps its trial slot forever
+            self.limiter.record(OUTCOME_ERROR)
+            raise
+        if not self._check_response(response.status_code, response.content, time.monotonic() - started):
+            logging.info(f"HTTP fetch blocked for {url} (status {response.status_code}), falling back to browser")
+            return None
+        if not response.ok:
+            logging.info(f"HTTP fetch failed for {url} with status {response.status_code}, falling back to browser")
+            return None
+
+        cached = self._cached_result(url, entry, response.status_code, response.content)
+        if cached is not None:
+            return cached
+        return self._parse_http(url, response.content, entry, response.headers)
+
+    def _parse_http(self, url: str, content: bytes, entry: Optional[Dict] = None, headers=None) -> Optional[Dict]:
+        """Parse a plain-HTTP response body; None means the browser tier is needed."""
+        if not content:
+            return None
+        soup = self._parse(content)
+        result = self._result(url, soup, TIER_HTTP)
+        if result['price'] is None:
+            json_ld = self._extract_json_ld(soup)
+            result['price'] = json_ld.get('price')
+            result['title'] = result['title'] or json_ld.get('title')
+        if result['price'] is None:
+            return None
+        self._store_in_cache(url, soup, result, entry, headers, content_hash(content))
+        return result
+
+    def _browser_result(self, url: str, soup: BeautifulSoup) -> Dict:
+        result = self._result(url, soup, TIER_BROWSER)
+        if result['price'] is not None:
+            cache = get_page_cache()
+            self._store_in_cache(url, soup, result, cache.get(url) if cache else None)
+        return result
+
+    def _render_page(self, url: str) -> str:
+        """Load the page in a pooled browser and return the rendered source."""
+        # Wait for the site's turn before tying up a browser
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            page_source = render_page(url, self.wait_selector, self.timeout, self.site, self.price_wait_selector)
+        except Exception:
+            # Any failure, not just BrowserError (e.g. reading the performance
+            # log), must be recorded to release a half-open circuit's trial slot
+            self.limiter.record(OUTCOME_ERROR)
+            raise
+
+        if self._is_blocked(page_source):
+            self.limiter.record(OUTCOME_BLOCKED)
+            raise BlockedError(f"CAPTCHA page served for {url}")
+        self.limiter.record(OUTCOME_OK, time.monotonic() - started, TIER_BROWSER)
+        return page_source
+
+    def scrape_product(self, url: str) -> Optional[Dict]:
         """Main scraping method with retry logic"""
-        pass
+
+        for attempt in range(self.retry_attempts):
+            try:
+                if self.http_fast_path:
+                    result = self._scrape_http(url)
+                    if result is not None:
+                        record_tier(self.site, TIER_HTTP)
+                        return result
+                    metrics.inc('fallbacks_total', site=self.site)
+
+                page_source = self._render_page(url)
+                record_tier(self.site, TIER_BROWSER)
+                return self._browser_result(url, self._parse(page_source))
+
+            except CircuitOpenError as e:
+                logging.warning(f"Skipping {url}: {e}")
+                metrics.inc('scrapes_total', site=self.site, outcome='skipped')
+                return self._result(url)
+            except (BrowserError, requests.exceptions.RequestException, BlockedError) as e:
+                logging.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if attempt == self.retry_attempts - 1:
+                    logging.error(f"Final scraping failure for {url}")
+                    metrics.inc('scrapes_total', site=self.site, outcome='failed')
+                    return self._result(url)
+                metrics.inc('retries_total', site=self.site)
+
+    async def _scrape_http_async(self, url: str, session: 'aiohttp.ClientSession') -> Optional[Dict]:
+        """Async counterpart of ``_scrape_http`` using the shared aiohttp session."""
+        import aiohttp
+        cache = get_page_cache()
+        entry = await asyncio.to_thread(cache.get, url) if cache else None
+        await self.limiter.acquire_async()
+        started = time.monotonic()
+        try:
+            with metrics.span('http_fetch', self.site):
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                       headers=PageCache.conditional_headers(entry)) as response:
+                    content = await response.read()
+                    status, headers = response.status, response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.limiter.record(OUTCOME_ERROR)
+            logging.info(f"HTTP fetch failed for {url}, falling back to browser: {e}")
+            return None
+        except BaseException:
+            # Including cancellation: release a half-open circuit's trial slot
+            self.limiter.record(OUTCOME_ERROR)
+            raise
+        if not self._check_response(status, content, time.monotonic() - started):
+            logging.info(f"HTTP fetch blocked for {url} (status {status}), falling back to browser")
+            return None
+        if status >= 400:
+            logging.info(f"HTTP fetch failed for {url} with status {status}, falling back to browser")
+            return None
+
+        cached = await asyncio.to_thread(self._cached_result, url, entry, status, content)
+        if cached is not None:
+            return cached
+        # Parsing is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(self._parse_http, url, content, entry, headers)
+
+    async def scrape_product_async(self, url: str, session: 'aiohttp.ClientSession') -> Optional[Dict]:
+        """Async scraping method with retry logic.
+
+        The plain-HTTP tier runs natively on the event loop; the browser tier is
+        blocking and runs in a worker thread.
+        """
+
+        for attempt in range(self.retry_attempts):
+            try:
+                if self.http_fast_path:
+                    result = await self._scrape_http_async(url, session)
+                    if result is not None:
+                        record_tier(self.site, TIER_HTTP)
+                        return result
+                    metrics.inc('fallbacks_total', site=self.site)
+
+                page_source = await asyncio.to_thread(self._render_page, url)
+                record_tier(self.site, TIER_BROWSER)
+                soup = await asyncio.to_thread(self._parse, page_source)
+                return await asyncio.to_thread(self._browser_result, url, soup)
+
+            except CircuitOpenError as e:
+                logging.warning(f"Skipping {url}: {e}")
+                metrics.inc('scrapes_total', site=self.site, outcome='skipped')
+                return self._result(url)
+            except (BrowserError, BlockedError) as e:
+                logging.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if attempt == self.retry_attempts - 1:
+                    logging.error(f"Final scraping failure for {url}")
+                    metrics.inc('scrapes_total', site=self.site, outcome='failed')
+                    return self._result(url)
+                metrics.inc('retries_total', site=self.site)
+
     def get_product_id(self, url: str) -> Optional[str]:
-        """Extract ASIN from Amazon URL"""
+        """Site-specific product id in the URL (ASIN, MLB id...), or None."""
+        return None
+
+
+class Route(NamedTuple):
+    scraper: BaseScraper
+    urls: List[str]
+
+
+def _scraper_class(url: str) -> Optional[type]:
+    """Resolve the scraper class for a URL, by host when possible."""
+    host = (urlsplit(url).hostname or '').lower()
+    try:
+        return _host_routes[host]
+    except KeyError:
         pass
 
+    for compiled, scraper_class in _compiled_patterns:
+        if compiled.search(url):
+            # Only remember the host when the pattern matched the host itself
+            if host and compiled.search(host):
+                _host_routes[host] = scraper_class
+            return scraper_class
+    return None
+
+
+def _instance(scraper_class: type) -> BaseScraper:
+    scraper = _instances.get(scraper_class)
+    if scraper is None:
+        with _dispatch_lock:
+            scraper = _instances.get(scraper_class)
+            if scraper is None:
+                scraper = _instances[scraper_class] = scraper_class()
+    return scraper
+
 
 def get_scraper(url: str) -> BaseScraper:
-    for pattern, scraper_class in SCRAPER_REGISTRY.items():
-        if re.search(pattern, url, re.IGNORECASE):
-            return scraper_class()
-    raise ValueError(f"No scraper available for URL: {url}")
+    """Return the shared scraper instance for ``url``.
+
+    Hosts are routed with a dict lookup after their first URL; the compiled
+    patterns are only searched for hosts not seen before. Scrapers hold no
+    per-page state, so one instance per class serves every URL and thread.
+    """
+    scraper_class = _scraper_class(url)
+    if scraper_class is None:
+        raise ValueError(f"No scraper available for URL: {url}")
+    return _instance(scraper_class)
+
+
+def route_many(urls: List[str]) -> Tuple[Dict[str, Route], List[str]]:
+    """Group URLs by site for batched execution.
+
+    Returns ``({site: Route(scraper, urls)}, unsupported_urls)``, keeping the
+    order of the URLs within each site.
+    """
+    routes: Dict[str, Route] = {}
+    unsupported = []
+    for url in urls:
+        scraper_class = _scraper_class(url)
+        if scraper_class is None:
+            unsupported.append(url)
+            continue
+        route = routes.get(scraper_class.site)
+        if route is None:
+            route = routes[scraper_class.site] = Route(_instance(scraper_class), [])
+        route.urls.append(url)
+    return routes, unsupported
 
 def compare_prices(current_product: Dict, new_product: Dict) -> Dict:
     """Compare two prices between two products and returns the lowest product."""
-    if 'price' not in current_product:
+    # Failed and out-of-stock results carry no price and never win
+    if current_product.get('price') is None:
         return new_product
-    if 'price' not in new_product:
+    if new_product.get('price') is None:
         return current_product
     if new_product['price'] < current_product['price']:
         return new_product
@@ -0,0 +1,133 @@
+"""Scrape worker for the distributed engine.
+
+Leases URL jobs from the shared queue, scrapes them and reports the results.
+Start as many as the machines' browsers allow, each pointing at the same
+``queue.path``:
+
+    python -m scrapers.worker --concurrency 2
+"""
+import signal
+import logging
+import argparse
+import threading
+from typing import Optional, Set
+
+import scrapers  # noqa: F401  (registers the site scrapers)
+from config_loader import load_config
+from scheduler.job_queue import JobQueue, get_job_queue, new_worker_id
+from scrapers import scraper as Scraper
+from scrapers.browser import close_browsers
+from scrapers.engine import log_tier_stats
+from monitoring import metrics
+
+
+# Load configuration from YAML file
+config = load_config()
+
+
+class ScrapeWorker:
+    """Lease jobs with ``concurrency`` threads and keep the leases alive while scraping.
+
+    A failed scrape is handed back to the queue, which retries it later (on
+    any worker) until the job's attempts run out. If the worker dies, its
+    leases simply expire and the jobs become visible to the other workers.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None, concurrency: int = 1,
+                 worker_id: Optional[str] = None, poll_interval: float = 2.0):
+        self.queue = queue or get_job_queue()
+        self.concurrency = concurrency
+        self.worker_id = worker_id or new_worker_id()
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self._held: Set[int] = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat(self):
+        # Renew well before the visibility timeout runs out
+        interval = self.queue.visibility_timeout / 3
+        while not self._stop.wait(interval):
+            with self._held_lock:
+                held = list(self._held)
+            if held:
+                self.queue.heartbeat(held, self.worker_id)
+
+    def _process(self, job):
+        url = job['payload']['url']
+        with self._held_lock:
+            self._held.add(job['id'])
+        try:
+            logging.info(f"Worker {self.worker_id} scraping {url} (attempt {job['attempt']})")
+            result = Scraper.get_scraper(url).scrape_product(url)
+            if result and result['success']:
+                if not self.queue.complete(job['id'], self.worker_id, result):
+                    logging.warning(f"Lease on job {job['id']} was lost, result dropped")
+            else:
+                self.queue.fail(job['id'], self.worker_id, f"scrape failed for {url}")
+        except Exception as e:
+            logging.error(f"Job {job['id']} failed: {e}")
+            self.queue.fail(job['id'], self.worker_id, str(e))
+        finally:
+            with self._held_lock:
+                self._held.discard(job['id'])
+                self.processed += 1
+
+    def _loop(self, exit_when_idle: bool):
+        while not self._stop.is_set():
+            jobs = self.queue.lease(self.worker_id)
+            if not jobs:
+                if exit_when_idle:
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            for job in jobs:
+                self._process(job)
+
+    def run(self, exit_when_idle: bool = False):
+        """Process jobs until ``stop`` is called (or the queue is empty, if asked)."""
+        heartbeat = threading.Thread(target=self._heartbeat, name='worker-heartbeat', daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._loop, args=(exit_when_idle,), name=f'worker-{i}')
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._stop.set()
+        log_tier_stats()
+        logging.info(f"Worker {self.worker_id} processed {self.processed} jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape jobs from the shared job queue")
+    parser.add_argument('--concurrency', type=int, default=(config.get('queue') or {}).get('worker_concurrency', 1))
+    parser.add_argument('--exit-when-idle', action='store_true', help="stop once no job is ready")
+    parser.add_argument('--metrics-port', type=int, default=(config.get('monitoring') or {}).get('worker_metrics_port'),
+                        help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=config["logging"]["file"],
+        level=logging.INFO,
+        format="%(asctime)s:%(levelname)s:%(message)s"
+    )
+    if args.metrics_port:
+        metrics.start_metrics_server((config.get('monitoring') or {}).get('metrics_host', '127.0.0.1'), args.metrics_port)
+    worker = ScrapeWorker(concurrency=args.concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run(exit_when_idle=args.exit_when_idle)
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        close_browsers()
+
+
+if __name__ == '__main__':
+    main()
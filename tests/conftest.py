@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules load the config at import time; tests use the example config
+os.environ.setdefault('PRICE_SCANNER_CONFIG', os.path.join(ROOT, 'config', 'example_config.yaml'))
@@ -0,0 +1,44 @@
+import time
+
+from scrapers.browser import _page_ready
+
+
+class StubDriver:
+    """Answers the readiness checks from plain attributes."""
+
+    def __init__(self, ready_state='interactive', selectors=()):
+        self.ready_state = ready_state
+        self.selectors = set(selectors)
+
+    def find_elements(self, by, selector):
+        return ['element'] if selector in self.selectors else []
+
+    def execute_script(self, script):
+        assert 'readyState' in script
+        return self.ready_state
+
+
+def test_ready_as_soon_as_the_price_is_rendered():
+    ready = _page_ready('div#main', 'span.price', grace=60)
+    assert ready(StubDriver(selectors={'span.price'}))
+
+
+def test_eager_dom_without_price_keeps_waiting():
+    ready = _page_ready('div#main', 'span.price', grace=60)
+    # DOMContentLoaded fired, the JS that renders the price has not run yet
+    assert not ready(StubDriver('interactive', {'div#main'}))
+    assert not ready(StubDriver('loading', {'div#main'}))
+
+
+def test_no_price_once_the_page_completed():
+    ready = _page_ready('div#main', 'span.price', grace=60)
+    assert ready(StubDriver('complete', {'div#main'}))
+    assert not ready(StubDriver('complete'))
+
+
+def test_no_price_after_the_grace_period():
+    ready = _page_ready('div#main', 'span.price', grace=0.05)
+    driver = StubDriver('interactive', {'div#main'})
+    assert not ready(driver)
+    time.sleep(0.1)
+    assert ready(driver)
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from catalog.catalog import Catalog, CatalogError
+from database.database import DatabaseHandler
+
+PS5 = 'https://www.amazon.com.br/dp/B0ABCDEFGH'
+BUDS = 'https://www.mercadolivre.com.br/p/MLB29595951'
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseHandler(str(tmp_path / 'catalog.db'))
+    yield db
+    db.close()
+
+
+def active(db):
+    return sorted({name for name, *_ in db.fetch_listing_offers()})
+
+
+def write(path, text):
+    path.write_text(text)
+    # Make every rewrite visible to refresh, however fast the test runs
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_bad_rows_are_skipped(db, tmp_path):
+    source = tmp_path / 'catalog.jsonl'
+    write(source, f'{{"name": "PS5", "urls": ["{PS5}"]}}\nnot json\n["not a product"]\n'
+                  f'{{"name": "Buds", "url": "{BUDS}"}}\n{{"name": "No URL"}}\n')
+    catalog = Catalog(db, [str(source)])
+
+    assert catalog.refresh()
+    assert active(db) == ['Buds', 'PS5']
+
+
+def test_csv_rows_without_name_or_url_are_skipped(db, tmp_path):
+    source = tmp_path / 'catalog.csv'
+    write(source, f'name,url\nPS5,{PS5}\nPS5,{BUDS}\n,{BUDS}\nNo URL,\n')
+    catalog = Catalog(db, [str(source)])
+
+    assert catalog.refresh()
+    assert db.fetch_listing_offers() == [('PS5', PS5, 'R$', None, None, None), ('PS5', BUDS, 'R$', None, None, None)]
+
+
+@pytest.mark.parametrize('broken', ['', 'products:\n', 'products: [unclosed\n'])
+def test_failed_reload_keeps_the_previous_catalog(db, tmp_path, broken):
+    source = tmp_path / 'catalog.yaml'
+    write(source, f'products:\n  - name: PS5\n    urls: ["{PS5}"]\n  - name: Buds\n    urls: ["{BUDS}"]\n')
+    catalog = Catalog(db, [str(source)])
+    assert catalog.refresh()
+
+    # An empty, half-written or unparsable file must not deactivate everything
+    write(source, broken)
+    assert not catalog.refresh()
+    assert active(db) == ['Buds', 'PS5']
+    with pytest.raises(CatalogError):
+        catalog.load()
+
+    write(source, f'products:\n  - name: PS5\n    urls: ["{PS5}"]\n')
+    assert catalog.refresh()
+    assert active(db) == ['PS5']
+
+
+def test_csv_with_only_a_header_is_rejected(db, tmp_path):
+    source = tmp_path / 'catalog.csv'
+    write(source, f'name,url\nPS5,{PS5}\n')
+    catalog = Catalog(db, [str(source)])
+    assert catalog.refresh()
+
+    write(source, 'name,url\n')
+    assert not catalog.refresh()
+    assert active(db) == ['PS5']
@@ -0,0 +1,129 @@
+import asyncio
+from contextlib import closing
+
+import pytest
+
+from bot.delivery import MAX_MEDIA_GROUP, DeliveryQueue
+from bot.fake_bot_api import FakeBotAPI
+from database.database import DatabaseHandler
+
+
+@pytest.fixture
+def api():
+    api = FakeBotAPI().start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseHandler(str(tmp_path / 'outbox.db'))
+    yield db
+    db.close()
+
+
+def make_queue(api, db, **kwargs):
+    options = dict(chat_rate=1000, chat_burst=100, global_rate=1000, backoff_base=0.01)
+    options.update(kwargs)
+    return DeliveryQueue('123:TEST', 42, db=db, base_url=api.base_url, **options)
+
+
+def outbox(db):
+    """(status, attempts) of every outbox message, oldest first."""
+    with closing(db._conn.cursor()) as cursor:
+        cursor.execute('SELECT status, attempts FROM outbox ORDER BY id')
+        return cursor.fetchall()
+
+
+def run(queue, scenario):
+    """Run ``scenario`` on one event loop, so the bot's HTTP client is reused."""
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await queue.close()
+    return asyncio.run(main())
+
+
+def test_text_messages_go_out_as_one_digest(api, db):
+    queue = make_queue(api, db)
+    for i in range(3):
+        queue.enqueue(f"alert {i}")
+
+    assert run(queue, queue.flush) == 3
+    messages = api.sent('sendMessage')
+    assert len(messages) == 1
+    assert messages[0]['params']['text'] == "alert 0\n\nalert 1\n\nalert 2"
+    assert outbox(db) == [('sent', 0)] * 3
+
+
+def test_photos_are_batched_into_media_groups(api, db, tmp_path):
+    queue = make_queue(api, db)
+    for i in range(MAX_MEDIA_GROUP + 2):
+        path = tmp_path / f'chart_{i}.png'
+        path.write_bytes(b'\x89PNG fake chart')
+        queue.enqueue(f"alert {i}", str(path))
+
+    assert run(queue, queue.flush) == MAX_MEDIA_GROUP + 2
+    assert [request['photos'] for request in api.sent('sendMediaGroup')] == [MAX_MEDIA_GROUP, 2]
+    assert not api.sent('sendPhoto')
+    assert outbox(db) == [('sent', 0)] * (MAX_MEDIA_GROUP + 2)
+
+
+def test_missing_chart_is_sent_as_text(api, db, tmp_path):
+    queue = make_queue(api, db)
+    queue.enqueue("alert", str(tmp_path / 'deleted.png'))
+
+    assert run(queue, queue.flush) == 1
+    assert len(api.sent('sendMessage')) == 1
+
+
+def test_429_is_retried_after_retry_after(api, db):
+    queue = make_queue(api, db)
+    queue.enqueue("price drop")
+
+    async def scenario():
+        await queue._get_bot()
+        api.fail_next(error_code=429, retry_after=1)
+        first = await queue.flush()
+        # Not due again before Telegram's retry_after
+        early = await queue.flush()
+        await asyncio.sleep(1.1)
+        return first, early, await queue.flush()
+
+    assert run(queue, scenario) == (0, 0, 1)
+    assert [request['failed'] for request in api.sent('sendMessage')] == [True, False]
+    assert outbox(db) == [('sent', 1)]
+
+
+def test_message_is_dropped_after_max_attempts(api, db):
+    queue = make_queue(api, db, max_attempts=2)
+    queue.enqueue("price drop")
+
+    async def scenario():
+        await queue._get_bot()
+        api.fail_next(count=3, error_code=500)
+        delivered = []
+        for _ in range(3):
+            delivered.append(await queue.flush())
+            # Past the (tiny) backoff
+            await asyncio.sleep(0.1)
+        return delivered
+
+    assert run(queue, scenario) == [0, 0, 0]
+    # The third flush found nothing due: the message had failed for good
+    assert len(api.sent('sendMessage')) == 2
+    assert outbox(db) == [('failed', 2)]
+
+
+def test_bad_request_is_not_retried(api, db):
+    queue = make_queue(api, db)
+    queue.enqueue("price drop")
+
+    async def scenario():
+        await queue._get_bot()
+        api.fail_next(error_code=400)
+        return await queue.flush()
+
+    assert run(queue, scenario) == 0
+    assert outbox(db) == [('failed', 1)]
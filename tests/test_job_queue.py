@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from scheduler.job_queue import STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, JobQueue
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make_queue(**kwargs):
+        queue = JobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make_queue
+    for queue in queues:
+        queue.close()
+
+
+def status(queue, job_id):
+    return queue.fetch_jobs([job_id])[job_id]
+
+
+def test_enqueue_dedups_live_jobs(make_queue):
+    queue = make_queue()
+    job_id = queue.enqueue({'url': 'a'}, 'a@1')
+    assert queue.enqueue({'url': 'a'}, 'a@1') == job_id
+    assert queue.enqueue({'url': 'a'}, 'a@2') != job_id
+    assert queue.enqueue({'url': 'a'}) != job_id
+
+    [job] = queue.lease('w1')
+    assert job['id'] == job_id
+    assert queue.enqueue({'url': 'a'}, 'a@1') == job_id
+
+
+def test_finished_job_is_reused_within_dedup_window(make_queue):
+    queue = make_queue(dedup_window=0.2)
+    job_id = queue.enqueue({'url': 'a'}, 'a@1')
+    queue.lease('w1')
+    assert queue.complete(job_id, 'w1', {'price': 10.0})
+
+    # A restarted coordinator gets the finished job and its result back
+    assert queue.enqueue({'url': 'a'}, 'a@1') == job_id
+    assert status(queue, job_id)['result'] == {'price': 10.0}
+    time.sleep(0.3)
+    assert queue.enqueue({'url': 'a'}, 'a@1') != job_id
+
+
+def test_expired_lease_is_handed_to_another_worker(make_queue):
+    queue = make_queue()
+    job_id = queue.enqueue({'url': 'a'}, 'a')
+    assert queue.lease('w1', visibility_timeout=0.1)[0]['attempt'] == 1
+    assert queue.lease('w2') == []
+
+    time.sleep(0.2)
+    [job] = queue.lease('w2')
+    assert (job['id'], job['attempt']) == (job_id, 2)
+    # Only the current lease holder may finish the job
+    assert not queue.complete(job_id, 'w1', {'price': 1.0})
+    assert not queue.fail(job_id, 'w1', 'too late')
+    assert queue.complete(job_id, 'w2', {'price': 2.0})
+    assert status(queue, job_id) == {'status': STATUS_DONE, 'result': {'price': 2.0}, 'error': None}
+
+
+def test_heartbeat_keeps_the_lease(make_queue):
+    queue = make_queue()
+    job_id = queue.enqueue({'url': 'a'}, 'a')
+    queue.lease('w1', visibility_timeout=0.2)
+    time.sleep(0.1)
+    assert queue.heartbeat([job_id], 'w1', visibility_timeout=1) == 1
+    assert queue.heartbeat([job_id], 'w2') == 0
+    time.sleep(0.2)
+    assert queue.lease('w2') == []
+
+
+def test_failed_job_is_retried_until_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2, retry_delay=0.1)
+    job_id = queue.enqueue({'url': 'a'}, 'a')
+
+    queue.lease('w1')
+    assert queue.fail(job_id, 'w1', 'timeout')
+    assert status(queue, job_id)['status'] == STATUS_QUEUED
+    # The retry waits for retry_delay
+    assert queue.lease('w1') == []
+    time.sleep(0.15)
+    assert queue.lease('w1')[0]['attempt'] == 2
+    assert queue.fail(job_id, 'w1', 'timeout again')
+    assert status(queue, job_id) == {'status': STATUS_FAILED, 'result': None, 'error': 'timeout again'}
+    assert queue.lease('w1') == []
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(make_queue):
+    queue = make_queue(max_attempts=1)
+    job_id = queue.enqueue({'url': 'a'}, 'a')
+    queue.lease('w1', visibility_timeout=0.1)
+    time.sleep(0.2)
+
+    assert queue.lease('w2') == []
+    assert status(queue, job_id) == {'status': STATUS_FAILED, 'result': None, 'error': 'lease expired'}
+
+
+def test_jobs_survive_reopening_the_file(make_queue):
+    job_id = make_queue().enqueue({'url': 'a'}, 'a')
+    [job] = make_queue().lease('w1')
+    assert job == {'id': job_id, 'payload': {'url': 'a'}, 'attempt': 1}
@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+import scrapers  # noqa: F401  (registers the site scrapers)
+from scrapers import scraper as Scraper
+from scrapers.parsing import parse_price
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES_DIR, 'expected.json')) as f:
+    EXPECTED = json.load(f)
+
+
+@pytest.mark.parametrize('text, price', [
+    ('R$ 3.799,00', 3799.0),
+    ('R$\xa03.799,00', 3799.0),
+    ('R$3799,00', 3799.0),
+    ('R$ 1.234.567,8', 1234567.8),
+    ('1.299', 1299.0),
+    ('399', 399.0),
+    ('12,50', 12.5),
+    ('$1,299.99', 1299.99),
+])
+def test_parse_price(text, price):
+    assert parse_price(text, 'R$') == price
+
+
+@pytest.mark.parametrize('text', ['', 'R$', 'Indisponível'])
+def test_parse_price_without_a_number(text):
+    with pytest.raises(ValueError):
+        parse_price(text, 'R$')
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_fixture_extraction(name):
+    site = name.split('_')[0]
+    scraper = next(cls for cls in Scraper.SCRAPER_REGISTRY.values() if cls.site == site)()
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        soup = scraper._parse(f.read())
+    assert scraper._extract_price(soup) == EXPECTED[name]['price']
+    assert scraper._extract_product_title(soup).strip() == EXPECTED[name]['title']
@@ -0,0 +1,73 @@
+import pytest
+
+from catalog.catalog import Catalog
+from catalog.product_index import ProductIndex
+from database.database import DatabaseHandler
+from scheduler.job_scheduler import ListingScheduler
+
+AMAZON = 'https://www.amazon.com.br/dp/B0ABCDEFGH'
+AMAZON_OTHER = 'https://www.amazon.com.br/dp/B0ZZZZZZZZ'
+MERCADOLIVRE = 'https://www.mercadolivre.com.br/p/MLB29595951'
+NO_ID = 'https://www.mercadolivre.com.br/console-ps5-slim'
+
+
+def scraped(price, title=None):
+    return {'price': price, 'title': title, 'currency': 'R$', 'success': True}
+
+
+def test_offers_are_merged_when_a_product_is_matched_by_title():
+    index = ProductIndex()
+    index.update('PS5', AMAZON, scraped(3799.0, 'Console PlayStation 5'))
+    # Known only under its own catalog name so far
+    index.update('PlayStation 5', NO_ID, scraped(3499.0))
+    assert index.best_offer('PlayStation 5').price == 3499.0
+
+    # Another listing of it shows the same product
+    index.update('PlayStation 5', MERCADOLIVRE, scraped(3699.0, 'PlayStation 5 Console'))
+    assert index.best_offer('PS5') == index.best_offer('PlayStation 5')
+    assert index.best_offer('PS5').price == 3499.0
+    assert index.resolve(NO_ID, name='PlayStation 5') == 'PS5'
+
+
+def test_site_comes_from_the_routed_scraper():
+    index = ProductIndex()
+    assert index.update('PS5', NO_ID, scraped(3499.0)).site == 'mercadolivre'
+
+
+def test_load_rebuilds_title_matches():
+    rows = [
+        ('PS5', AMAZON, 'R$', 3799.0, 1.0, 'Console PlayStation 5'),
+        ('PlayStation 5', MERCADOLIVRE, 'R$', 3699.0, 2.0, 'PlayStation 5 Console'),
+        ('PlayStation 5', NO_ID, 'R$', None, None, None),
+        ('Xbox', AMAZON_OTHER, 'R$', 2999.0, 3.0, 'Xbox Series S'),
+    ]
+    index = ProductIndex()
+    index.load(rows)
+    assert index.best_offer('PlayStation 5').price == 3699.0
+    assert index.best_offer('PS5').price == 3699.0
+    assert index.best_offer('Xbox').price == 2999.0
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseHandler(str(tmp_path / 'index.db'))
+    yield db
+    db.close()
+
+
+def test_titles_survive_a_reload_from_the_database(db, tmp_path):
+    source = tmp_path / 'catalog.jsonl'
+    source.write_text(f'{{"name": "PS5", "urls": ["{AMAZON}"]}}\n'
+                      f'{{"name": "PlayStation 5", "urls": ["{MERCADOLIVRE}"]}}\n')
+    Catalog(db, [str(source)]).load()
+    ListingScheduler(db).record([
+        {'product': {'name': 'PS5'}, 'listings': {AMAZON: scraped(3799.0, 'Console PlayStation 5')}},
+        {'product': {'name': 'PlayStation 5'}, 'listings': {MERCADOLIVRE: scraped(3699.0, 'PlayStation 5 Console')}},
+    ])
+    # A failed check keeps the stored title
+    ListingScheduler(db).record([{'product': {'name': 'PS5'}, 'listings': {AMAZON: None}}])
+
+    index = ProductIndex()
+    index.load(db.fetch_listing_offers())
+    assert index.best_offer('PS5').price == 3699.0
+    assert index.best_offer('PS5') == index.best_offer('PlayStation 5')
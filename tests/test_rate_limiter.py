@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+import scrapers  # noqa: F401  (registers the site scrapers)
+from scrapers import scraper as Scraper
+from scrapers.rate_limiter import (CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, OUTCOME_ERROR, OUTCOME_OK,
+                                   CircuitOpenError, DomainLimiter)
+
+URL = 'https://www.amazon.com.br/dp/B0ABCDEFGH'
+
+
+def tripped_limiter(**kwargs) -> DomainLimiter:
+    """A limiter whose circuit just opened and whose cooldown already ran out."""
+    limiter = DomainLimiter('amazon', rate=1000, burst=1000, failure_threshold=1, cooldown=0.05, **kwargs)
+    limiter.record(OUTCOME_ERROR)
+    assert limiter.state == CIRCUIT_OPEN
+    time.sleep(0.1)
+    return limiter
+
+
+def test_half_open_circuit_allows_a_single_trial():
+    limiter = tripped_limiter()
+    limiter.reserve()
+    assert limiter.state == CIRCUIT_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        limiter.reserve()
+
+    limiter.record(OUTCOME_OK, 0.1)
+    assert limiter.state == CIRCUIT_CLOSED
+    limiter.reserve()
+
+
+def test_failed_trial_doubles_the_cooldown():
+    limiter = tripped_limiter()
+    limiter.reserve()
+    limiter.record(OUTCOME_ERROR)
+    assert (limiter.state, limiter.cooldown) == (CIRCUIT_OPEN, 0.1)
+    with pytest.raises(CircuitOpenError):
+        limiter.reserve()
+
+
+def test_unexpected_render_error_releases_the_trial(monkeypatch):
+    scraper = Scraper.get_scraper(URL)
+    monkeypatch.setattr(scraper, 'limiter', tripped_limiter())
+
+    def broken_render(*args, **kwargs):
+        raise KeyError('requestId')
+
+    monkeypatch.setattr(Scraper, 'render_page', broken_render)
+    with pytest.raises(KeyError):
+        scraper._render_page(URL)
+
+    # The failed trial reopened the circuit instead of holding the slot forever
+    assert scraper.limiter.state == CIRCUIT_OPEN
+    time.sleep(0.15)
+    scraper.limiter.reserve()
+    assert scraper.limiter.state == CIRCUIT_HALF_OPEN
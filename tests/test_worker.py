@@ -0,0 +1,48 @@
+import pytest
+
+from scheduler.job_queue import STATUS_DONE, STATUS_FAILED, JobQueue
+from scrapers import scraper as Scraper
+from scrapers.worker import ScrapeWorker
+
+
+class StubScraper:
+    """Answers from a table instead of the network; raises for unknown URLs."""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def scrape_product(self, url):
+        self.calls.append(url)
+        if url not in self.prices:
+            raise RuntimeError(f"connection reset by {url}")
+        price = self.prices[url]
+        return {'url': url, 'price': price, 'success': price is not None}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # The page cache and logs of the worker land in the test directory
+    monkeypatch.chdir(tmp_path)
+    queue = JobQueue(str(tmp_path / 'jobs.db'), max_attempts=2, retry_delay=0)
+    yield queue
+    queue.close()
+
+
+def test_worker_completes_and_retries_jobs(queue, monkeypatch):
+    stub = StubScraper({'https://shop/ok': 99.9, 'https://shop/no-price': None})
+    monkeypatch.setattr(Scraper, 'get_scraper', lambda url: stub)
+    ok, no_price, broken = queue.enqueue_many([{'url': 'https://shop/ok'}, {'url': 'https://shop/no-price'},
+                                               {'url': 'https://shop/broken'}])
+
+    worker = ScrapeWorker(queue, concurrency=2, worker_id='w1')
+    worker.run(exit_when_idle=True)
+
+    jobs = queue.fetch_jobs([ok, no_price, broken])
+    assert jobs[ok]['status'] == STATUS_DONE
+    assert jobs[ok]['result']['price'] == 99.9
+    # Unsuccessful scrapes are retried on the queue until max_attempts
+    assert jobs[no_price]['status'] == STATUS_FAILED
+    assert jobs[broken] == {'status': STATUS_FAILED, 'result': None, 'error': 'connection reset by https://shop/broken'}
+    assert stub.calls.count('https://shop/broken') == 2
+    assert worker.processed == 5